@@ -0,0 +1,191 @@
+"""構造格子メッシュ(三角形・四角形・四面体・六面体)をmshフォーマットで生成する
+
+使用例:
+    python -m benchmarks.generate tri 100000 tri_1e5.msh
+"""
+import argparse
+import itertools
+import numpy as np
+
+#####生成可能なメッシュの種類と(次元, 要素タイプ, 境界要素タイプ)の対応
+kinds = {
+    "tri" : (2, 2, 1),
+    "quad" : (2, 3, 1),
+    "tet" : (3, 4, 2),
+    "hex" : (3, 5, 3),
+}
+
+#####単位立方体をKuhn分割したときの四面体の数
+_kuhn_num = 6
+
+def get_divisions(kind:str, num_elements:int)->int:
+    """要素数がおよそnum_elementsとなる各軸の分割数を出力
+
+    Args:
+        kind (str): メッシュの種類
+        num_elements (int): 目標要素数
+    Returns:
+        int: 各軸の分割数
+    """
+    dim = kinds[kind][0]
+    per_cell = {"tri" : 2, "quad" : 1, "tet" : _kuhn_num, "hex" : 1}[kind]
+    return max(1, int(round((num_elements/per_cell)**(1./dim))))
+
+
+def _node_index(n:int, dim:int)->np.ndarray:
+    """格子点(i, j(, k))の節点番号(ゼロ始まり)を出力。shapeは(n+1, n+1(, n+1))でindexingは"ij"。
+    """
+    return np.arange((n+1)**dim).reshape((n+1,)*dim, order = "F")
+
+
+def _quads(idx:np.ndarray)->np.ndarray:
+    """2次元格子の各セルを反時計回りの四角形として出力。shapeは(C, 4)。
+    """
+    return np.stack((idx[:-1,:-1], idx[1:,:-1], idx[1:,1:], idx[:-1,1:]), axis = -1).reshape((-1, 4), order = "F")
+
+
+def _hexes(idx:np.ndarray)->np.ndarray:
+    """3次元格子の各セルを六面体として出力。shapeは(C, 8)。
+    """
+    corners = []
+    for k in (0, 1):
+        sk = slice(k, idx.shape[2]-1+k)
+        corners += [idx[:-1,:-1,sk], idx[1:,:-1,sk], idx[1:,1:,sk], idx[:-1,1:,sk]]
+    return np.stack(corners, axis = -1).reshape((-1, 8), order = "F")
+
+
+def _tets(points:np.ndarray, hexes:np.ndarray)->np.ndarray:
+    """六面体をKuhn分割した正の体積をもつ四面体を出力。shapeは(6C, 4)。
+    """
+    #六面体の局所節点番号 (x, y, z)
+    local = {(0,0,0):0, (1,0,0):1, (1,1,0):2, (0,1,0):3, (0,0,1):4, (1,0,1):5, (1,1,1):6, (0,1,1):7}
+    tets = []
+    for perm in itertools.permutations(range(3)):
+        path = [np.zeros(3, dtype = int)]
+        for axis in perm:
+            v = path[-1].copy(); v[axis] = 1
+            path.append(v)
+        tets.append(hexes[:,[local[tuple(v)] for v in path]])
+    tets = np.concatenate(tets, axis = 0)
+
+    p = points[tets]
+    det = np.linalg.det(np.stack((p[:,1]-p[:,0], p[:,2]-p[:,0], p[:,3]-p[:,0]), axis = 1))
+    tets[det < 0] = tets[det < 0][:,[0, 2, 1, 3]]
+    return tets
+
+
+def _boundary(idx:np.ndarray, kind:str)->np.ndarray:
+    """境界要素の節点番号を出力
+    """
+    if kinds[kind][0] == 2:
+        ring = np.concatenate((idx[:-1,0], idx[-1,:-1], idx[:0:-1,-1], idx[0,:0:-1]))
+        return np.stack((ring, np.roll(ring, -1)), axis = 1)
+
+    faces = []
+    for axis in range(3):
+        for side in (0, -1):
+            face = np.moveaxis(idx, axis, 0)[side]
+            quads = _quads(face)
+            #axis == 1ではmoveaxis後の面内の軸順(x, z)が逆向きとなるため、向きを反転する
+            faces.append(quads if (side == -1) != (axis == 1) else quads[:,::-1])
+    faces = np.concatenate(faces, axis = 0)
+    if kind == "tet":
+        faces = np.concatenate((faces[:,[0, 1, 2]], faces[:,[0, 2, 3]]), axis = 0)
+    return faces
+
+
+def generate(kind:str, n:int)->tuple[np.ndarray]:
+    """単位正方形(立方体)上の構造格子メッシュを生成
+
+    Args:
+        kind (str): "tri", "quad", "tet", "hex"のいずれか
+        n (int): 各軸の分割数
+    Returns:
+        tuple[np.ndarray]: (points, cells, boundary)。それぞれshapeは(N, 3), (M, K), (B, L)。節点番号はゼロ始まり。
+    """
+    dim = kinds[kind][0]
+    axis = np.linspace(0., 1., n+1)
+    grid = np.meshgrid(*(axis,)*dim, indexing = "ij")
+    points = np.zeros(((n+1)**dim, 3))
+    for d in range(dim):
+        points[:,d] = grid[d].ravel(order = "F")
+    idx = _node_index(n, dim)
+
+    if kind == "quad":
+        cells = _quads(idx)
+    elif kind == "tri":
+        quads = _quads(idx)
+        cells = np.concatenate((quads[:,[0, 1, 2]], quads[:,[0, 2, 3]]), axis = 0)
+    elif kind == "hex":
+        cells = _hexes(idx)
+    elif kind == "tet":
+        cells = _tets(points, _hexes(idx))
+    else:
+        raise NotImplementedError
+
+    return points, cells, _boundary(idx, kind)
+
+
+def _write_elements(file, start:int, e_type:int, phys_tag:int, cells:np.ndarray)->None:
+    """要素をmsh version 2.2の形式で書き出す (phys_tagは1始まり)
+    """
+    num = len(cells)
+    table = np.empty((num, 5 + cells.shape[1]), dtype = np.int64)
+    table[:,0] = np.arange(start, start + num)
+    table[:,1] = e_type
+    table[:,2] = 2
+    table[:,3] = phys_tag
+    table[:,4] = phys_tag
+    table[:,5:] = cells + 1
+    np.savetxt(file, table, fmt = "%d")
+
+
+def write(filename:str, kind:str, n:int)->tuple[int]:
+    """構造格子メッシュをmshファイル(version 2.2)として書き出す
+
+    Args:
+        filename (str): ファイル名
+        kind (str): メッシュの種類
+        n (int): 各軸の分割数
+    Returns:
+        tuple[int]: (節点数, 要素数)。要素数は境界要素を含む。
+    Note:
+        * PhysicalGroupは"boundary"(dim-1)と"region"(dim)の2つ。
+    """
+    dim, e_type, b_type = kinds[kind]
+    points, cells, boundary = generate(kind, n)
+
+    with open(filename, "w") as file:
+        file.write("$MeshFormat\n2.2 0 8\n$EndMeshFormat\n")
+        file.write("$PhysicalNames\n2\n")
+        file.write(f"{dim-1} 1 \"boundary\"\n")
+        file.write(f"{dim} 2 \"region\"\n")
+        file.write("$EndPhysicalNames\n")
+
+        file.write(f"$Nodes\n{len(points)}\n")
+        table = np.concatenate((np.arange(1, len(points)+1)[:,None], points), axis = 1)
+        np.savetxt(file, table, fmt = ["%d", "%.17g", "%.17g", "%.17g"])
+        file.write("$EndNodes\n")
+
+        file.write(f"$Elements\n{len(boundary) + len(cells)}\n")
+        _write_elements(file, 1, b_type, 1, boundary)
+        _write_elements(file, len(boundary) + 1, e_type, 2, cells)
+        file.write("$EndElements\n")
+
+    return len(points), len(boundary) + len(cells)
+
+
+def main()->None:
+    parser = argparse.ArgumentParser(description = "Generate a structured mesh in msh format")
+    parser.add_argument("kind", type = str, choices = tuple(kinds))
+    parser.add_argument("num_elements", type = float, help = "approximate number of elements")
+    parser.add_argument("filename", type = str)
+    args = parser.parse_args()
+
+    n = get_divisions(args.kind, int(args.num_elements))
+    node_num, element_num = write(args.filename, args.kind, n)
+    print(f"{args.filename}: {node_num} nodes, {element_num} elements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""空間充填曲線による並べ替えの効果を計測するベンチマーク
+
+使用例:
+    python -m benchmarks.reorder mesh_sample.msh --dim 2 --shuffle
+"""
+import argparse
+import time
+import numpy as np
+import meshu
+from meshu import algorithm, geom, utils
+
+def timeit(func, repeat:int)->float:
+    """funcをrepeat回実行し、最短の実行時間[s]を出力
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def shuffle(mesh:meshu.Mesh, seed:int = 0)->None:
+    """節点及び要素の順序をランダムに並べ替える
+    """
+    rng = np.random.default_rng(seed)
+    new_node = rng.permutation(len(mesh.Nodes))
+    inv_node = np.empty(len(new_node), dtype = int)
+    inv_node[new_node] = np.arange(len(new_node))
+    mesh.Nodes = mesh.Nodes[new_node,]
+    elements = [mesh.Elements[e] for e in rng.permutation(len(mesh.Elements))]
+    for element in elements:
+        element["node_tag"] = tuple(int(inv_node[n]) for n in element["node_tag"])
+    mesh.Elements = elements
+
+
+def run_kernels(mesh:meshu.Mesh, repeat:int)->dict:
+    """ホットパスとなる各カーネルの実行時間を出力
+    """
+    offsets, node_tag = utils.get_connectivity(mesh, mesh.dim)
+    P = algorithm.get_cell2node_matrix(mesh)
+    cell_values = np.random.default_rng(0).random(P.shape[1])
+
+    result = {
+        "get_adjacency_matrix" : timeit(lambda : algorithm.get_adjacency_matrix(mesh), repeat),
+        "get_centroids" : timeit(lambda : geom.get_centroids(mesh), repeat),
+        "gather" : timeit(lambda : np.add.reduceat(mesh.Nodes[node_tag], offsets[:-1], axis = 0), repeat),
+        "cell2node" : timeit(lambda : P @ cell_values, repeat),
+    }
+    if mesh.dim == 2:
+        result["get_volumes"] = timeit(lambda : geom.get_volumes(mesh), repeat)
+    return result
+
+
+def main()->None:
+    parser = argparse.ArgumentParser(description = "Benchmark of space-filling-curve renumbering")
+    parser.add_argument("filename", type = str)
+    parser.add_argument("--dim", type = int, default = 2)
+    parser.add_argument("--curve", type = str, default = "hilbert", choices = ("hilbert", "morton"))
+    parser.add_argument("--repeat", type = int, default = 5)
+    parser.add_argument("--shuffle", action = "store_true", help = "randomly permute nodes and elements before measuring")
+    args = parser.parse_args()
+
+    mesh = meshu.Mesh(args.filename, args.dim)
+    if args.shuffle:
+        shuffle(mesh)
+    before = run_kernels(mesh, args.repeat)
+
+    start = time.perf_counter()
+    algorithm.renumbering_sfc(mesh, args.curve)
+    elapsed = time.perf_counter() - start
+    after = run_kernels(mesh, args.repeat)
+
+    print(f"renumbering_sfc ({args.curve}): {elapsed:.4f} s")
+    print(f"{'kernel':<24}{'before [s]':>14}{'after [s]':>14}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<24}{before[name]:>14.6f}{after[name]:>14.6f}{before[name]/after[name]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""meshu/pivtkのホットパスを計測し、結果をJSONで出力するベンチマーク
+
+使用例:
+    python -m benchmarks --kinds tri quad --sizes 1e3 1e4 1e5 --output result.json
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import scipy
+import meshu
+import pivtk
+from meshu import algorithm, geom, utils
+from benchmarks import generate
+
+#####計算量の大きいステップに対する既定の要素数上限 (--no-limitで解除)
+max_elements = {
+    "renumbering_node" : 10**4,
+}
+
+def _git_commit()->str:
+    """作業ツリーのコミットハッシュを出力。取得できない場合はNone。
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd = os.path.dirname(os.path.abspath(__file__)),
+            capture_output = True, text = True, check = True
+            ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_metadata()->dict:
+    """実行環境の情報を出力
+    """
+    return {
+        "commit" : _git_commit(),
+        "timestamp" : time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python" : sys.version.split()[0],
+        "numpy" : np.__version__,
+        "scipy" : scipy.__version__,
+        "platform" : platform.platform(),
+    }
+
+
+def measure(func, memory:bool, setup = None)->dict:
+    """funcの実行時間[s]と、memoryがTrueの場合はピークメモリ[byte]を出力
+
+    Args:
+        func (callable): 計測する関数
+        memory (bool): ピークメモリを計測するか否か
+        setup (callable, optional): funcの各実行の前に呼ぶ準備関数。計測には含めない。
+    Note:
+        * tracemallocによるオーバーヘッドを避けるため、ピークメモリは別途もう一度実行して計測する。
+    """
+    if setup is not None:
+        setup()
+    start = time.perf_counter()
+    func()
+    result = {"time" : time.perf_counter() - start, "peak_memory" : None}
+
+    if memory:
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        try:
+            func()
+            result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def get_steps(mesh:meshu.Mesh, workdir:str)->tuple[dict]:
+    """計測対象のステップ名と関数の辞書、及び各実行の前に呼ぶ準備関数(measureのsetup)の辞書を出力
+
+    Note:
+        * Meshを変更するステップは、準備関数で実行ごとに複製したMeshに対して実行する。
+        * get_phystag_COOに渡す隣接行列は準備関数で作成し、計測時間には含めない。
+    """
+    filename, dim = mesh.filename, mesh.dim
+    grid = meshu.getVTK(mesh)
+    vtk_filename = os.path.join(workdir, "bench.vtk")
+    grid.write(vtk_filename)
+    adjacency = {}
+    copies = {}
+    copy_mesh = lambda : copies.update(mesh = copy.deepcopy(mesh))
+    setups = {
+        "get_phystag_COO" : lambda : adjacency["A"] if "A" in adjacency else adjacency.setdefault("A", algorithm.get_adjacency_matrix(mesh)),
+        "renumbering_node" : copy_mesh,
+        "renumbering_sfc" : copy_mesh,
+    }
+
+    steps = {
+        "Mesh" : lambda : meshu.Mesh(filename, dim),
+        "Mesh.write" : lambda : mesh.write(os.path.join(workdir, "bench_write.msh")),
+        "get_adjacency_matrix" : lambda : algorithm.get_adjacency_matrix(mesh),
+        "get_order" : lambda : algorithm.get_order(mesh),
+        "renumbering_node" : lambda : algorithm.renumbering_node(copies["mesh"]),
+        "renumbering_sfc" : lambda : algorithm.renumbering_sfc(copies["mesh"]),
+        "get_node_element_incidence" : lambda : algorithm.get_node_element_incidence(mesh),
+        "get_phystag_COO" : lambda : utils.get_phystag_COO(mesh, adjacency["A"]),
+        "geom.get_centroids" : lambda : geom.get_centroids(mesh),
+        "Out.getVTK" : lambda : meshu.getVTK(mesh),
+        "pivtk.write" : lambda : grid.write(os.path.join(workdir, "bench_write.vtk")),
+        "pivtk.read" : lambda : pivtk.read(vtk_filename),
+    }
+    if dim == 2:
+        steps["geom.get_volumes"] = lambda : geom.get_volumes(mesh)
+        steps["geom.get_facet_normals"] = lambda : geom.get_facet_normals(mesh)
+    return steps, setups
+
+
+def run(kinds:list[str], sizes:list[int], workdir:str, memory:bool = True, limit:bool = True, steps:list[str] = None)->dict:
+    """ベンチマークを実行
+
+    Args:
+        kinds (list[str]): メッシュの種類のリスト
+        sizes (list[int]): 目標要素数のリスト
+        workdir (str): メッシュ及び出力ファイルを置くディレクトリ。生成済みのメッシュは再利用する。
+        memory (bool, optional): ピークメモリを計測するか否か
+        limit (bool, optional): max_elementsによる要素数上限を適用するか否か
+        steps (list[str], optional): 計測するステップ名。Noneの場合すべて。
+    Returns:
+        dict: {"meta" : 実行環境, "results" : 計測結果のリスト}
+    """
+    os.makedirs(workdir, exist_ok = True)
+    results = []
+    for kind in kinds:
+        dim = generate.kinds[kind][0]
+        for size in sizes:
+            n = generate.get_divisions(kind, size)
+            filename = os.path.join(workdir, f"{kind}_{n}.msh")
+            if not os.path.exists(filename):
+                generate.write(filename, kind, n)
+
+            mesh = meshu.Mesh(filename, dim)
+            element_num = len(utils.pickup_elementtag(mesh, dim))
+            bench_steps, setups = get_steps(mesh, workdir)
+            for name, func in bench_steps.items():
+                if steps is not None and name not in steps:
+                    continue
+                record = {"kind" : kind, "size" : size, "divisions" : n, "num_elements" : element_num, "step" : name}
+                if limit and element_num > max_elements.get(name, np.inf):
+                    record.update({"status" : "skipped", "time" : None, "peak_memory" : None})
+                else:
+                    record.update(measure(func, memory, setups.get(name)))
+                    record["status"] = "ok"
+                results.append(record)
+                print(f"{kind:<5}{element_num:>10} {name:<28}{record['status']:>8} "
+                      + ("" if record["time"] is None else f"{record['time']:>12.4f} s"), flush = True)
+
+    return {"meta" : get_metadata(), "results" : results}
+
+
+def compare(old:dict, new:dict)->list[dict]:
+    """2つのベンチマーク結果を比較
+
+    Args:
+        old (dict): 基準となる結果
+        new (dict): 比較対象の結果
+    Returns:
+        list[dict]: 共通する(kind, size, step)ごとの時間比 new/old。
+    """
+    key = lambda r : (r["kind"], r["size"], r["step"])
+    old_results = {key(r) : r for r in old["results"] if r["status"] == "ok"}
+    ratios = []
+    for r in new["results"]:
+        o = old_results.get(key(r))
+        if o is None or r["status"] != "ok":
+            continue
+        ratios.append({"kind" : r["kind"], "size" : r["size"], "step" : r["step"], "old" : o["time"], "new" : r["time"], "ratio" : r["time"]/o["time"]})
+    return ratios
+
+
+def main()->None:
+    parser = argparse.ArgumentParser(description = "Benchmark suite for meshu and pivtk")
+    parser.add_argument("--kinds", nargs = "+", default = list(generate.kinds), choices = tuple(generate.kinds))
+    parser.add_argument("--sizes", nargs = "+", type = float, default = [1e3, 1e4, 1e5])
+    parser.add_argument("--steps", nargs = "+", default = None)
+    parser.add_argument("--workdir", type = str, default = "bench_meshes")
+    parser.add_argument("--output", type = str, default = "bench_result.json")
+    parser.add_argument("--no-memory", action = "store_true", help = "skip peak memory measurement")
+    parser.add_argument("--no-limit", action = "store_true", help = "run slow steps on every size")
+    parser.add_argument("--compare", type = str, default = None, help = "previous result json to compare with")
+    args = parser.parse_args()
+
+    result = run(args.kinds, [int(s) for s in args.sizes], args.workdir, not args.no_memory, not args.no_limit, args.steps)
+    with open(args.output, "w") as file:
+        json.dump(result, file, indent = 1)
+
+    if args.compare is not None:
+        with open(args.compare, "r") as file:
+            old = json.load(file)
+        print(f"{'kind':<6}{'size':>10} {'step':<28}{'old [s]':>12}{'new [s]':>12}{'ratio':>8}")
+        for r in compare(old, result):
+            print(f"{r['kind']:<6}{r['size']:>10} {r['step']:<28}{r['old']:>12.4f}{r['new']:>12.4f}{r['ratio']:>8.2f}")
@@ -2,23 +2,27 @@ import numpy as np
 import pivtk
 from meshu import core, config, utils
 
-def getVTK(mesh:core.Mesh)->pivtk.unstructured_grid:
+def getVTK(mesh:core.Mesh, dim:int = None)->pivtk.unstructured_grid:
     """MeshオブジェクトからVTKファイルを作成
 
     Args:
         mesh (core.Mesh): Meshオブジェクト
+        dim (int, optional): 出力する要素の次元。Noneの場合mesh.dim。境界のみの部分メッシュなどに用いる。
     Returns:
         pivtkのunstructured gridオブジェクト
+    Note:
+        * 座標及びセルの節点インデックスの型はmesh.float_dtype, mesh.index_dtypeに従う。
     """
     assert mesh.dim > 1
+    dim = mesh.dim if dim is None else dim
 
     cells = []
-    element_tags = utils.pickup_elementtag(mesh, mesh.dim)
+    element_tags = utils.pickup_elementtag(mesh, dim)
     for element_tag in element_tags:
         element = mesh.Elements[element_tag]
         cell_type = config.etype_msh_vtk[element["type"]]
-        cell_indice = np.array(element["node_tag"])
+        cell_indice = np.array(element["node_tag"], dtype = mesh.index_dtype)
         cells.append({"type" : cell_type, "indice" : cell_indice})
     
-    geom = pivtk.unstructured_grid(mesh.Nodes, cells)
+    geom = pivtk.unstructured_grid(mesh.Nodes, cells, float_dtype = mesh.float_dtype)
     return geom
\ No newline at end of file
@@ -1,3 +1,4 @@
 from meshu.core import Mesh
-from meshu import config, utils, algorithm, geom
-from meshu.Out import getVTK
\ No newline at end of file
+from meshu import config, utils, algorithm, geom, operators, stream, ale, graph
+from meshu.Out import getVTK
+from pivtk import instrument
\ No newline at end of file
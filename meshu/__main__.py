@@ -0,0 +1,4 @@
+import sys
+from meshu.convert import main
+
+sys.exit(main())
@@ -0,0 +1,105 @@
+import numpy as np
+from meshu import utils, algorithm, geom
+from meshu.core import Mesh
+
+class GeometryState:
+    """節点移動(ALE)に対して要素及びファセットの幾何量を差分更新するクラス
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。節点座標はmesh.Nodesを直接書き換えて移動させる。
+        check (bool, optional): Trueの場合、差分更新のたびに全再計算の結果と一致することを確認する。
+        full_ratio (float, optional): 影響を受ける要素の割合がこれを超える場合、差分更新ではなく全再計算を行う。
+    Attributes:
+        mesh (Mesh): Meshオブジェクト
+        offsets (np.ndarray): 次元がmesh.dimの要素の接続情報(utils.get_connectivity)
+        node_tag (np.ndarray): 同上
+        facet_nodes (np.ndarray): ファセットの節点タグ。shapeは(2, F)。geom.get_facet_nodesと同じ順序。
+        incidence (csr_matrix): 節点から要素への接続関係(algorithm.get_node_element_incidence)
+        centroids (np.ndarray): 重心座標。shapeは(M, D)。
+        volumes (np.ndarray): 体積(2次元の場合は面積)。shapeは(M, )。
+        normals (np.ndarray): ファセットの外向き単位法線ベクトル。shapeは(F, D)。
+        areas (np.ndarray): ファセットの面積(2次元の場合は長さ)。shapeは(F, )。
+    Note:
+        * 第i要素のファセットはoffsets[i]からoffsets[i+1]までであり、facet_nodes等はnode_tagと同じ位置で対応する。
+        * 2次元のみ対応。
+    """
+    def __init__(self, mesh:Mesh, check:bool = False, full_ratio:float = 0.5)->None:
+        if mesh.dim != 2:
+            raise NotImplementedError
+        self.mesh = mesh
+        self.check = check
+        self.full_ratio = full_ratio
+
+        self.offsets, self.node_tag = utils.get_connectivity(mesh, mesh.dim)
+        self.facet_nodes = geom.get_facet_nodes_csr(self.offsets, self.node_tag)
+        self.incidence = algorithm.get_node_element_incidence(mesh)
+        self.recompute()
+
+    @property
+    def num_elements(self)->int:
+        """要素数を出力
+        """
+        return len(self.offsets) - 1
+
+    def recompute(self)->None:
+        """全要素・全ファセットの幾何量を再計算
+        """
+        Nodes = self.mesh.Nodes
+        self.centroids = geom.get_centroids_csr(Nodes, self.offsets, self.node_tag)
+        self.volumes = geom.get_volumes_csr(Nodes, self.offsets, self.node_tag)
+        self.normals, self.areas = geom.get_facet_normals_csr(Nodes, self.facet_nodes)
+
+    def get_affected_elements(self, displaced:np.ndarray)->np.ndarray:
+        """移動した節点を含む要素の番号を出力
+
+        Args:
+            displaced (np.ndarray): 移動した節点タグ
+        Returns:
+            np.ndarray: 要素番号 (utils.pickup_elementtagの出力順、昇順)
+        """
+        return np.unique(self.incidence[np.asarray(displaced)].indices)
+
+    def update(self, displaced:np.ndarray = None)->np.ndarray:
+        """節点移動後の幾何量を更新
+
+        Args:
+            displaced (np.ndarray, optional): 移動した節点タグ。Noneの場合は全再計算。
+        Returns:
+            np.ndarray: 更新した要素の番号。全再計算の場合はすべての要素。
+        """
+        if displaced is None:
+            self.recompute()
+            return np.arange(self.num_elements)
+
+        elements = self.get_affected_elements(displaced)
+        if len(elements) > self.full_ratio*self.num_elements:
+            self.recompute()
+            elements = np.arange(self.num_elements)
+        elif len(elements) > 0:
+            Nodes = self.mesh.Nodes
+            node_num = np.diff(self.offsets)[elements]
+            sub_offsets = np.concatenate((np.zeros(1, dtype = np.int64), np.cumsum(node_num)))
+            positions = np.arange(sub_offsets[-1]) - np.repeat(sub_offsets[:-1] - self.offsets[elements], node_num)
+            sub_node_tag = self.node_tag[positions]
+
+            self.centroids[elements] = geom.get_centroids_csr(Nodes, sub_offsets, sub_node_tag)
+            self.volumes[elements] = geom.get_volumes_csr(Nodes, sub_offsets, sub_node_tag)
+            self.normals[positions], self.areas[positions] = geom.get_facet_normals_csr(Nodes, self.facet_nodes[:,positions])
+
+        if self.check:
+            self.assert_consistent()
+        return elements
+
+    def assert_consistent(self, rtol:float = 1e-10, atol:float = 1e-12)->None:
+        """保持している幾何量が全再計算の結果と一致することを確認
+
+        Args:
+            rtol (float, optional): 相対許容誤差
+            atol (float, optional): 絶対許容誤差
+        """
+        Nodes = self.mesh.Nodes
+        normals, areas = geom.get_facet_normals_csr(Nodes, self.facet_nodes)
+        assert np.allclose(self.centroids, geom.get_centroids_csr(Nodes, self.offsets, self.node_tag), rtol, atol), "centroids are inconsistent"
+        assert np.allclose(self.volumes, geom.get_volumes_csr(Nodes, self.offsets, self.node_tag), rtol, atol), "volumes are inconsistent"
+        assert np.allclose(self.normals, normals, rtol, atol), "normals are inconsistent"
+        assert np.allclose(self.areas, areas, rtol, atol), "areas are inconsistent"
@@ -1,9 +1,17 @@
 import numpy as np
-from meshu import config, utils
+from meshu import config, utils, geom
 from meshu.core import Mesh
+from pivtk import instrument
 import sys
-from scipy.sparse import dok_matrix, triu
+from scipy.sparse import csr_matrix, diags
 
+def _count_elements(mesh:Mesh, *args, **kwargs)->int:
+    """instrument.timedで記録する個数 (要素数)
+    """
+    return len(mesh.Elements)
+
+
+@instrument.timed(count = _count_elements)
 def get_adjacency_matrix(mesh:Mesh, include_selfloop:bool = False, double_direction:bool = False)->np.ndarray:
     """メッシュ構造の隣接行列(COO形式)を出力
 
@@ -15,29 +23,24 @@ def get_adjacency_matrix(mesh:Mesh, include_selfloop:bool = False, double_direct
         np.ndarray: 隣接行列。shapeは(2, E)でEはエッジ数。
     Note:
         * 無向グラフを出力。
-        * 隣接行列の要素値は節点タグ。
+        * 隣接行列の要素値は節点タグ。型はmesh.index_dtype。
+        * 各要素の隣り合う節点(geom.get_facet_nodes_csrのファセット)を結ぶエッジを、(始点, 終点)の辞書順に出力。
     """
-    element_tags = utils.pickup_elementtag(mesh, mesh.dim)
-    elements = [mesh.Elements[et] for et in element_tags]
+    offsets, node_tag = utils.get_connectivity(mesh, mesh.dim)
+    facet_nodes = geom.get_facet_nodes_csr(offsets, node_tag).astype(np.int64)
     num_node = len(mesh.Nodes)
-    
-    A = dok_matrix((num_node, num_node), dtype = int)
-    for element in elements:
-        node_tag = element["node_tag"]
-        for i in range(len(node_tag)-1):
-            A[node_tag[i], node_tag[i+1]] = 1; A[node_tag[i+1], node_tag[i]] = 1
-        A[node_tag[0], node_tag[-1]] = 1; A[node_tag[-1], node_tag[0]] = 1
-    if include_selfloop:
-        for i in range(num_node):
-            A[i,i] = 1
 
-    A = A.tocoo()
-    if double_direction == False:
-        A = triu(A)
-    A = np.stack(A.coords, axis = 0)
+    row, col = facet_nodes.min(axis = 0), facet_nodes.max(axis = 0)
+    if include_selfloop:
+        row = np.concatenate((row, np.arange(num_node))); col = np.concatenate((col, np.arange(num_node)))
+    if double_direction:
+        row, col = np.concatenate((row, col)), np.concatenate((col, row))
+    key = np.unique(row*num_node + col)
+    A = np.stack((key // num_node, key % num_node), axis = 0).astype(mesh.index_dtype)
 
     return A
 
+@instrument.timed(count = _count_elements)
 def get_order(mesh:Mesh)->np.ndarray:
     """各ノードのオーダーを計算
 
@@ -48,9 +51,59 @@ def get_order(mesh:Mesh)->np.ndarray:
     """
     node_num = len(mesh.Nodes)
     A = get_adjacency_matrix(mesh, double_direction = True)
-    order = np.array([len(np.where(A[0] == i)[0]) for i in range(node_num)])
+    order = np.bincount(A[0], minlength = node_num)
     return order
 
+
+@instrument.timed(count = _count_elements)
+def get_node_element_incidence(mesh:Mesh, dim:int = None)->csr_matrix:
+    """節点から要素への接続関係(CSR形式)を出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。
+        dim (int, optional): 要素の次元。Noneの場合mesh.dim。
+    Returns:
+        csr_matrix: 接続行列。shapeは(N, M)でMは次元がdimの要素数。
+    Note:
+        * 列番号はpickup_elementtagの出力順(getVTKのセル順)と一致する。
+        * 第i節点が属する要素はindices[indptr[i]:indptr[i+1]]。
+        * 各節点の接続要素数はnp.diff(indptr)。
+    """
+    dim = mesh.dim if dim is None else dim
+    node_num = len(mesh.Nodes)
+    offsets, node_tag = utils.get_connectivity(mesh, dim)
+    element_num = len(offsets) - 1
+
+    index_dtype = config.get_index_dtype(max(element_num, len(node_tag)))
+    element_idx = np.repeat(np.arange(element_num, dtype = index_dtype), np.diff(offsets))
+    arg_sort = np.argsort(node_tag, kind = "stable")
+    indptr = np.concatenate((np.zeros(1, dtype = index_dtype), np.cumsum(np.bincount(node_tag, minlength = node_num), dtype = index_dtype)))
+    indices = element_idx[arg_sort]
+    data = np.ones(len(indices), dtype = index_dtype)
+
+    return csr_matrix((data, indices, indptr), shape = (node_num, element_num))
+
+
+@instrument.timed(count = _count_elements)
+def get_cell2node_matrix(mesh:Mesh)->csr_matrix:
+    """セル値から節点値への算術平均を行う疎行列を出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。
+    Returns:
+        csr_matrix: 平均化行列。shapeは(N, M)でMは次元がmesh.dimの要素数。
+    Note:
+        * 節点値はP @ cell_valuesで得られる。Pは時間ステップ間で再利用可能。
+        * どの要素にも属さない節点の行はゼロ。
+    """
+    incidence = get_node_element_incidence(mesh).astype(mesh.float_dtype)
+    degree = np.diff(incidence.indptr)
+    inv_degree = np.zeros(len(degree), dtype = mesh.float_dtype)
+    inv_degree[degree > 0] = 1./degree[degree > 0]
+
+    return (diags(inv_degree) @ incidence).tocsr()
+
+@instrument.timed(count = _count_elements)
 def renumbering_node(mesh:Mesh)->None:
     """Reverse Cuthill Mckeeによる節点タグの再分配
 
@@ -59,7 +112,7 @@ def renumbering_node(mesh:Mesh)->None:
     """
     node_num = len(mesh.Nodes)
     A = get_adjacency_matrix(mesh, double_direction = True)
-    order = np.array([len(np.where(A[0] == i)[0]) for i in range(node_num)])
+    order = np.bincount(A[0], minlength = node_num)
 
     new_tag = [np.argmin(order)]
     for i in range(node_num):
@@ -78,4 +131,119 @@ def renumbering_node(mesh:Mesh)->None:
     mesh.Nodes = mesh.Nodes[new_tag,]
     for i in range(len(mesh.Elements)):
         new_node_tag = tuple(np.where(new_tag == old_node_tag)[0][0] for old_node_tag in mesh.Elements[i]["node_tag"])
-        mesh.Elements[i]["node_tag"] = new_node_tag
\ No newline at end of file
+        mesh.Elements[i]["node_tag"] = new_node_tag
+
+def _interleave_bits(X:np.ndarray, bits:int)->np.ndarray:
+    """整数座標のビットを交互に並べたキーを出力
+
+    Args:
+        X (np.ndarray): 整数座標。shapeは(D, N)、dtypeはuint64。X[0]が最上位ビットとなる。
+        bits (int): 各軸のビット数。
+    Returns:
+        np.ndarray: キー。shapeは(N, )。
+    """
+    n = len(X)
+    key = np.zeros(X.shape[1], dtype = np.uint64)
+    one = np.uint64(1)
+    for b in range(bits):
+        for i in range(n):
+            key |= ((X[i] >> np.uint64(b)) & one) << np.uint64(b*n + n - 1 - i)
+    return key
+
+
+def _hilbert_transpose(X:np.ndarray, bits:int)->np.ndarray:
+    """Skillingの方法で整数座標をHilbert曲線の転置表現に変換
+
+    Args:
+        X (np.ndarray): 整数座標。shapeは(D, N)、dtypeはuint64。
+        bits (int): 各軸のビット数。
+    Returns:
+        np.ndarray: 転置表現。shapeは(D, N)。_interleave_bitsに渡すとHilbertキーになる。
+    """
+    X = X.copy()
+    n = len(X)
+    M = np.uint64(1 << (bits - 1))
+    Q = M
+    while Q > 1:
+        P = Q - np.uint64(1)
+        for i in range(n):
+            mask = (X[i] & Q) > 0
+            X[0] = np.where(mask, X[0] ^ P, X[0])
+            t = np.where(mask, np.uint64(0), (X[0] ^ X[i]) & P)
+            X[0] ^= t; X[i] ^= t
+        Q >>= np.uint64(1)
+
+    for i in range(1, n):
+        X[i] ^= X[i-1]
+    t = np.zeros(X.shape[1], dtype = np.uint64)
+    Q = M
+    while Q > 1:
+        t = np.where((X[n-1] & Q) > 0, t ^ (Q - np.uint64(1)), t)
+        Q >>= np.uint64(1)
+    X ^= t
+
+    return X
+
+
+@instrument.timed(count = lambda points, *args, **kwargs : len(points))
+def get_sfc_key(points:np.ndarray, curve:str = "hilbert")->np.ndarray:
+    """空間充填曲線上の位置を表すキーを出力
+
+    Args:
+        points (np.ndarray): 座標値。shapeは(N, D)。
+        curve (str, optional): "hilbert"もしくは"morton"。
+    Returns:
+        np.ndarray: キー(uint64)。shapeは(N, )。
+    Note:
+        * 座標はバウンディングボックスで正規化し、各軸63//Dビットの整数に量子化する。
+    """
+    points = np.asarray(points, dtype = np.float64)
+    n = points.shape[1]
+    bits = 63//n
+    lower = points.min(axis = 0)
+    extent = points.max(axis = 0) - lower
+    extent[extent == 0.] = 1.
+    X = np.floor((points - lower)/extent*((1 << bits) - 1)).astype(np.uint64).T
+
+    if curve == "hilbert":
+        X = _hilbert_transpose(X, bits)
+    elif curve != "morton":
+        raise NotImplementedError
+    return _interleave_bits(X, bits)
+
+
+@instrument.timed(count = _count_elements)
+def renumbering_sfc(mesh:Mesh, curve:str = "hilbert")->tuple[np.ndarray]:
+    """空間充填曲線による節点タグ及び要素タグの再分配
+
+    Args:
+        mesh (Mesh): 分配前Meshオブジェクト
+        curve (str, optional): "hilbert"もしくは"morton"。
+    Returns:
+        tuple[np.ndarray]: (new_node, new_element)。新しい第i節点(要素)は分配前の第new_node[i](new_element[i])節点(要素)。
+    Note:
+        * 節点は座標、要素は重心のキーで並べ替える。
+        * 要素は次元ごとにまとめたまま並べ替え、phys_tagは要素と共に移動する。
+        * 節点・要素に紐づくデータはvalues[new_node]のように並べ替えられる。
+    """
+    new_node = np.argsort(get_sfc_key(mesh.Nodes, curve), kind = "stable")
+    inv_node = np.empty(len(new_node), dtype = mesh.index_dtype)
+    inv_node[new_node] = np.arange(len(new_node), dtype = mesh.index_dtype)
+
+    offsets, node_tag = utils.get_connectivity(mesh)
+    centroid = geom.get_centroids_csr(mesh.Nodes, offsets, node_tag)
+    type2dim = {t : d for d, types in config.element_types.items() for t in types}
+    element_dim = np.array([type2dim.get(e["type"], -1) for e in mesh.Elements])
+    new_element = np.lexsort((get_sfc_key(centroid, curve), element_dim))
+
+    node_tag = inv_node[node_tag].tolist()
+    elements = []
+    for e in new_element:
+        element = dict(mesh.Elements[e])
+        element["node_tag"] = tuple(node_tag[offsets[e]:offsets[e+1]])
+        elements.append(element)
+
+    mesh.Nodes = mesh.Nodes[new_node,]
+    mesh.Elements = elements
+
+    return new_node, new_element
@@ -1,3 +1,5 @@
+import numpy as np
+
 #####gmsh要素タイプと次元の対応
 element_types = {
     0 : tuple([15]),
@@ -8,7 +10,21 @@ element_types = {
 
 #####gmsh要素タイプとvtk要素タイプの対応
 etype_msh_vtk = {
+    1:3, #line
     2:5, #triangle
     3:9, #quad
+    4:10, #tetrahedron
+    5:12, #hexahedron
     6:13, #prism
-}
\ No newline at end of file
+}
+
+#####インデックス型の選択 (int32で表せない場合はint64)
+def get_index_dtype(num:int)->type:
+    """num個の対象を指すインデックスに用いる整数型を出力
+
+    Args:
+        num (int): 対象の個数 (節点数など)
+    Returns:
+        type: np.int32もしくはnp.int64
+    """
+    return np.int32 if num < np.iinfo(np.int32).max else np.int64
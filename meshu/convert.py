@@ -0,0 +1,210 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from meshu.core import Mesh
+from meshu.Out import getVTK
+
+#####出力フォーマットと拡張子の対応
+formats = {
+    "ascii" : ".vtk",
+    "binary" : ".vtk",
+    "vtu" : ".vtu",
+}
+
+def find_meshes(patterns:list[str])->list[str]:
+    """ディレクトリもしくはglobパターンからmshファイルのリストを出力
+
+    Args:
+        patterns (list[str]): ディレクトリ、ファイル名、もしくはglobパターンのリスト
+    Returns:
+        list[str]: mshファイル名のリスト (重複なし、ソート済み)
+    """
+    filenames = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            filenames.update(glob.glob(os.path.join(pattern, "**", "*.msh"), recursive = True))
+        else:
+            filenames.update(glob.glob(pattern, recursive = True))
+    return sorted(filenames)
+
+
+def get_output_filename(filename:str, fmt:str, output_dir:str = None, root:str = None)->str:
+    """出力ファイル名を出力
+
+    Args:
+        filename (str): mshファイル名
+        fmt (str): 出力フォーマット
+        output_dir (str, optional): 出力先ディレクトリ。Noneの場合mshファイルと同じディレクトリ。
+        root (str, optional): output_dirを指定した場合に、output_dir以下で保持するパスの基準ディレクトリ。Noneの場合はファイル名のみを用いる。
+    Returns:
+        str: 出力ファイル名
+    """
+    stem = os.path.splitext(filename)[0]
+    if output_dir is not None:
+        stem = os.path.join(output_dir, os.path.basename(stem) if root is None else os.path.relpath(os.path.abspath(stem), root))
+    return stem + formats[fmt]
+
+
+def get_root(filenames:list[str])->str:
+    """mshファイルのディレクトリに共通する親ディレクトリを出力
+    """
+    return os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in filenames]) if filenames else None
+
+
+def get_data_filename(filename:str)->str:
+    """mshファイルに付随する結果配列のファイル名(拡張子.npz)を出力。存在しない場合はNone。
+    """
+    data_filename = os.path.splitext(filename)[0] + ".npz"
+    return data_filename if os.path.exists(data_filename) else None
+
+
+def is_uptodate(filename:str, output:str)->bool:
+    """出力ファイルがmshファイル及び結果配列より新しいか否かを判定
+    """
+    if not os.path.exists(output):
+        return False
+    sources = [filename] + [f for f in (get_data_filename(filename),) if f is not None]
+    return os.path.getmtime(output) >= max(os.path.getmtime(f) for f in sources)
+
+
+def convert(filename:str, output:str, dim:int = 2, fmt:str = "ascii", precision:str = "float64")->dict:
+    """mshファイル(と付随する結果配列)をVTKファイルに変換
+
+    Args:
+        filename (str): mshファイル名
+        output (str): 出力ファイル名
+        dim (int, optional): メッシュの次元
+        fmt (str, optional): "ascii", "binary", "vtu"のいずれか
+        precision (str, optional): 節点座標及びデータの浮動小数点型 ("float32"もしくは"float64")
+    Returns:
+        dict: 変換結果。keyは"input", "output", "status", "time", "phases"。
+    Note:
+        * mshファイルと同名の.npzファイルがある場合、長さが節点数の配列はポイントデータ、要素数の配列はセルデータとして書き出す。
+        * "phases"は読み込み・変換・書き出しの各時間[s]。
+    """
+    start = time.perf_counter()
+    mesh = Mesh(filename, dim, float_dtype = np.dtype(precision).type)
+    read_end = time.perf_counter()
+
+    grid = getVTK(mesh)
+    data_filename = get_data_filename(filename)
+    if data_filename is not None:
+        with np.load(data_filename) as arrays:
+            for name in arrays.files:
+                values = arrays[name]
+                if len(values) == grid.num_points:
+                    grid.add_pointdata(name, values)
+                elif len(values) == grid.num_cells:
+                    grid.add_celldata(name, values)
+    convert_end = time.perf_counter()
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok = True)
+    if fmt == "vtu":
+        grid.write_vtu(output)
+    else:
+        grid.write(output, binary = (fmt == "binary"))
+    end = time.perf_counter()
+
+    phases = {"read" : read_end - start, "convert" : convert_end - read_end, "write" : end - convert_end}
+    return {"input" : filename, "output" : output, "status" : "converted", "time" : end - start, "phases" : phases}
+
+
+def _convert_job(args:tuple)->dict:
+    """プロセスプールから呼ばれる変換ジョブ。例外は結果に記録する。
+    """
+    filename, output = args[:2]
+    try:
+        return convert(*args)
+    except Exception as e:
+        return {"input" : filename, "output" : output, "status" : "failed", "time" : None, "phases" : None, "error" : f"{type(e).__name__}: {e}"}
+
+
+def convert_all(filenames:list[str], dim:int = 2, fmt:str = "ascii", output_dir:str = None, workers:int = None, force:bool = False, progress:bool = True, precision:str = "float64")->list[dict]:
+    """複数のmshファイルをプロセスプールで並列に変換
+
+    Args:
+        filenames (list[str]): mshファイル名のリスト
+        dim (int, optional): メッシュの次元
+        fmt (str, optional): 出力フォーマット
+        output_dir (str, optional): 出力先ディレクトリ
+        workers (int, optional): プロセス数。Noneの場合CPU数。
+        force (bool, optional): Trueの場合、最新の出力ファイルがあっても変換する。
+        progress (bool, optional): Trueの場合、進捗を標準エラー出力に表示する。
+        precision (str, optional): convertのprecision
+    Returns:
+        list[dict]: 各ファイルの変換結果。statusは"converted", "skipped", "failed"のいずれか。
+    Note:
+        * output_dirを指定した場合、mshファイルの共通の親ディレクトリからの相対パスをoutput_dir以下に保持する。
+        * 出力ファイル名が既出のファイルと重複する場合は変換せず"failed"とする。
+    """
+    results = []
+    jobs = []
+    root = get_root(filenames)
+    outputs = {}
+    for filename in filenames:
+        output = get_output_filename(filename, fmt, output_dir, root)
+        key = os.path.normcase(os.path.abspath(output))
+        if key in outputs:
+            results.append({"input" : filename, "output" : output, "status" : "failed", "time" : None, "phases" : None, "error" : f"output is the same as {outputs[key]}"})
+            continue
+        outputs[key] = filename
+        if not force and is_uptodate(filename, output):
+            results.append({"input" : filename, "output" : output, "status" : "skipped", "time" : None, "phases" : None})
+        else:
+            jobs.append((filename, output, dim, fmt, precision))
+
+    total = len(jobs)
+    if total == 0:
+        return results
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        futures = [executor.submit(_convert_job, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            if progress:
+                elapsed = "failed" if result["time"] is None else f"{result['time']:.3f} s"
+                print(f"[{done}/{total}] {result['input']} ({elapsed})", file = sys.stderr, flush = True)
+
+    return results
+
+
+def format_summary(results:list[dict])->str:
+    """変換結果を表形式の文字列で出力
+    """
+    lines = [f"{'file':<48}{'status':>10}{'read [s]':>10}{'convert [s]':>12}{'write [s]':>10}{'total [s]':>10}"]
+    for r in sorted(results, key = lambda r : -(r["time"] or 0.)):
+        if r["phases"] is None:
+            lines.append(f"{r['input']:<48}{r['status']:>10}" + (f"  {r['error']}" if "error" in r else ""))
+        else:
+            p = r["phases"]
+            lines.append(f"{r['input']:<48}{r['status']:>10}{p['read']:>10.3f}{p['convert']:>12.3f}{p['write']:>10.3f}{r['time']:>10.3f}")
+    count = {s : sum(r["status"] == s for r in results) for s in ("converted", "skipped", "failed")}
+    total = sum(r["time"] for r in results if r["time"] is not None)
+    lines.append(f"converted: {count['converted']}, skipped: {count['skipped']}, failed: {count['failed']}, cpu time: {total:.3f} s")
+    return "\n".join(lines)
+
+
+def main(argv:list[str] = None)->int:
+    parser = argparse.ArgumentParser(prog = "python -m meshu", description = "Convert msh files to VTK in parallel")
+    parser.add_argument("inputs", nargs = "+", help = "msh files, directories or glob patterns")
+    parser.add_argument("--dim", type = int, default = 2)
+    parser.add_argument("--format", type = str, default = "ascii", choices = tuple(formats))
+    parser.add_argument("--precision", type = str, default = "float64", choices = ("float32", "float64"))
+    parser.add_argument("--output-dir", type = str, default = None)
+    parser.add_argument("--workers", type = int, default = None)
+    parser.add_argument("--force", action = "store_true", help = "convert even if the output is up to date")
+    parser.add_argument("--quiet", action = "store_true", help = "do not show progress and summary")
+    args = parser.parse_args(argv)
+
+    filenames = find_meshes(args.inputs)
+    start = time.perf_counter()
+    results = convert_all(filenames, args.dim, args.format, args.output_dir, args.workers, args.force, not args.quiet, args.precision)
+    if not args.quiet:
+        print(format_summary(results))
+        print(f"wall time: {time.perf_counter() - start:.3f} s")
+
+    return int(any(r["status"] == "failed" for r in results))
@@ -1,11 +1,17 @@
 import numpy as np
+import itertools
 import re
+from pivtk import instrument
+from meshu import config
 
 class Mesh:
     """mshフォーマットで定義されたメッシュに関するクラス
 
     Attributes:
+        filename (str): 読み込んだmshファイル名
         dim (int): 次元
+        float_dtype (type): 節点座標の浮動小数点型 (np.float32もしくはnp.float64)
+        index_dtype (type): 接続情報などのインデックス配列の整数型 (np.int32もしくはnp.int64)
         PhysicalGroups (list[dict]) PhysicalGroupのリスト。辞書型のkeyは以下の通り
             * dim (int): PhysicalGroupの次元
             * name (int): 名前
@@ -18,40 +24,95 @@ class Mesh:
     Note:
         * ゼロから始まるphys_tagはPhysicalGroupのインデックス番号と対応する。phys_tag == iの場合、その要素のPhysicalGroupはPhysicalGroups[i]。
         * ゼロから始まるnode_tagはNodesのインデックス番号と対応する。node_tag == iの場合、その節点はNodes[i]。
+        * index_dtypeはNoneの場合、節点数及び要素数に応じてconfig.get_index_dtypeで選択される。
+        * index_dtypeはutils.get_connectivityやalgorithmの各関数、Out.getVTKが出力する配列に適用される。
     """
-    def __init__(self, filename:str, dim:int)->None:
+    def __init__(self, filename:str, dim:int, float_dtype:type = np.float64, index_dtype:type = None)->None:
         assert 1 <= dim <= 3
+        assert np.dtype(float_dtype) in (np.float32, np.float64)
+        self.filename = filename
         self.dim = dim
+        self.float_dtype = float_dtype
+        self.index_dtype = index_dtype
 
         self.PhysicalGroups = []
         self.Nodes = []
         self.Elements = []
 
-        with open(filename, "r") as file:
-            lines = file.readlines()
-        current_index = 0
-        while True:
-            if lines[current_index][:-1] == "$EndMeshFormat":
-                current_index += 1
-                break
-            current_index += 1
-        
-        while True:
-            if lines[current_index][:-1] == "$PhysicalNames":
-                current_index += 1
-                current_index = self.read_PhysicalGroups(lines, current_index)
-            elif lines[current_index][:-1] == "$Nodes":
-                current_index += 1
-                current_index = self.read_Nodes(lines, current_index)
-            elif lines[current_index][:-1] == "$Elements":
+        with instrument.phase("Mesh.__init__"):
+            with instrument.phase("read") as ph:
+                with open(filename, "r") as file:
+                    lines = file.readlines()
+                    ph.add(count = len(lines), nbytes = file.tell())
+
+            current_index = 0
+            while True:
+                if lines[current_index][:-1] == "$EndMeshFormat":
+                    current_index += 1
+                    break
                 current_index += 1
-                current_index = self.read_Elements(lines, current_index)
-            else:
-                NotImplementedError
+            
+            while True:
+                if lines[current_index][:-1] == "$PhysicalNames":
+                    current_index += 1
+                    current_index = self.read_section("PhysicalNames", self.read_PhysicalGroups, lines, current_index)
+                elif lines[current_index][:-1] == "$Nodes":
+                    current_index += 1
+                    current_index = self.read_section("Nodes", self.read_Nodes, lines, current_index)
+                elif lines[current_index][:-1] == "$Elements":
+                    current_index += 1
+                    current_index = self.read_section("Elements", self.read_Elements, lines, current_index)
+                else:
+                    NotImplementedError
+
+                if current_index == len(lines):
+                    break
+
+        if self.index_dtype is None:
+            self.index_dtype = config.get_index_dtype(max(len(self.Nodes), len(self.Elements)))
 
-            if current_index == len(lines):
-                break
+    @classmethod
+    def from_data(cls, dim:int, PhysicalGroups:list[dict], Nodes:np.ndarray, Elements:list[dict], index_dtype:type = None)->"Mesh":
+        """ファイルを介さずにMeshオブジェクトを作成
+
+        Args:
+            dim (int): 次元
+            PhysicalGroups (list[dict]): PhysicalGroupのリスト
+            Nodes (np.ndarray): 全節点の座標値。コピーせずにそのまま保持する。
+            Elements (list[dict]): 要素のリスト
+            index_dtype (type, optional): インデックス配列の整数型。Noneの場合は自動で選択。
+        Returns:
+            Mesh: Meshオブジェクト。filenameはNone、float_dtypeはNodesの型。
+        Note:
+            * filenameがNoneのため、operators.get_operatorsのキャッシュは使われない。
+        """
+        mesh = cls.__new__(cls)
+        mesh.filename = None
+        mesh.dim = dim
+        mesh.float_dtype = Nodes.dtype.type
+        mesh.PhysicalGroups = PhysicalGroups
+        mesh.Nodes = Nodes
+        mesh.Elements = Elements
+        mesh.index_dtype = config.get_index_dtype(max(len(Nodes), len(Elements))) if index_dtype is None else index_dtype
+        return mesh
     
+    def read_section(self, name:str, reader, lines:list[str], current_index:int)->int:
+        """セクションを読み込み、計測が有効な場合は区間nameとして記録する
+
+        Args:
+            name (str): 区間名
+            reader (callable): read_Nodesなどの読み込み関数
+            lines (list[str]): ファイルの全行
+            current_index (int): セクションの先頭行
+        Returns:
+            int: セクション終了後の行番号
+        """
+        with instrument.phase(name) as ph:
+            end_index = reader(lines, current_index)
+            if ph:
+                ph.add(count = end_index - current_index - 2, nbytes = sum(len(l) for l in lines[current_index:end_index]))
+        return end_index
+
     def read_PhysicalGroups(self, lines:list[str], current_index:int)->int:
         phys_num = int(lines[current_index])
         current_index += 1
@@ -84,7 +145,7 @@ class Mesh:
         self.Nodes = np.stack(self.Nodes)
         assert np.all(np.isclose(self.Nodes[:,self.dim:], 0.))
         
-        self.Nodes = self.Nodes[:,:self.dim]
+        self.Nodes = self.Nodes[:,:self.dim].astype(self.float_dtype)
         assert self.Nodes.shape == (node_num, self.dim), f"{self.Nodes.shape}"
 
         assert lines[current_index][:-1] == "$EndNodes"
@@ -111,6 +172,84 @@ class Mesh:
 
         return current_index + 1
     
+    def get_physical_index(self)->dict:
+        """PhysicalGroupの索引を出力
+
+        Returns:
+            dict: 索引。keyは以下の通り。
+                * tag (dict[int, np.ndarray]): phys_tagから要素タグ(昇順)の配列への対応
+                * name (dict[str, int]): PhysicalGroupの名前からphys_tagへの対応
+        Note:
+            * 索引は初回呼び出し時に一度の走査で作成し、Elementsが置き換えられるか要素数が変わるまで再利用する。
+            * 要素のphys_tagを直接書き換えた場合は、Elementsを置き換えるなどして索引を再作成させること。
+            * 索引の配列は読み取り専用。
+        """
+        cache = getattr(self, "_physical_index", None)
+        if cache is not None and cache[0] is self.Elements and cache[1] == len(self.Elements):
+            return cache[2]
+
+        phys_tag = np.fromiter((e["phys_tag"] for e in self.Elements), dtype = np.int64, count = len(self.Elements))
+        arg_sort = np.argsort(phys_tag, kind = "stable").astype(self.index_dtype)
+        arg_sort.flags.writeable = False
+        tags, starts = np.unique(phys_tag[arg_sort], return_index = True)
+        index = {
+            "tag" : {int(t) : a for t, a in zip(tags, np.split(arg_sort, starts[1:]))},
+            "name" : {phys_g["name"] : idx for idx, phys_g in enumerate(self.PhysicalGroups)},
+        }
+        self._physical_index = (self.Elements, len(self.Elements), index)
+        return index
+
+    def get_physical_elementtag(self, names)->np.ndarray:
+        """PhysicalGroupに属する要素タグを出力
+
+        Args:
+            names (str | list[str]): PhysicalGroupの名前もしくはそのリスト
+        Returns:
+            np.ndarray: 要素タグ (ゼロ始まり、昇順)。索引とは独立したコピー。
+        """
+        names = [names] if isinstance(names, str) else list(names)
+        index = self.get_physical_index()
+        empty = np.zeros(0, dtype = self.index_dtype)
+        element_tag = [index["tag"].get(index["name"][name], empty) for name in names]
+        return np.sort(np.concatenate(element_tag)) if len(names) > 1 else element_tag[0].copy()
+
+    def submesh(self, names)->"Mesh":
+        """PhysicalGroupに属する要素のみから成るMeshを出力
+
+        Args:
+            names (str | list[str]): PhysicalGroupの名前もしくはそのリスト
+        Returns:
+            Mesh: 部分メッシュ。以下の属性が追加される。
+                * node_map (np.ndarray): 部分メッシュの第i節点は元のメッシュのnode_map[i]節点。
+                * element_map (np.ndarray): 部分メッシュの第i要素は元のメッシュのelement_map[i]要素。
+        Note:
+            * 計算量はPhysicalGroupの大きさに比例し、元のメッシュの大きさには依存しない (索引作成済みの場合)。
+            * 使用する節点のタグが連続している場合、NodesはコピーせずにNodesのビューとなる。
+            * PhysicalGroupsは元のメッシュと同じものを保持するため、phys_tagはそのまま有効。
+            * from_dataで作成するため、filenameはNoneとなる (operators.get_operatorsのキャッシュは使われない)。
+        """
+        element_map = self.get_physical_elementtag(names)
+        elements = [self.Elements[t] for t in element_map]
+        node_num = np.fromiter((len(e["node_tag"]) for e in elements), dtype = np.int64, count = len(elements))
+        node_tag = np.fromiter(itertools.chain.from_iterable(e["node_tag"] for e in elements), dtype = self.index_dtype, count = node_num.sum())
+
+        node_map = np.unique(node_tag)
+        if len(node_map) > 0 and node_map[-1] - node_map[0] + 1 == len(node_map):
+            Nodes = self.Nodes[node_map[0]:node_map[-1]+1]
+        else:
+            Nodes = self.Nodes[node_map]
+        local_tag = np.searchsorted(node_map, node_tag).tolist()
+
+        offsets = np.concatenate(([0], np.cumsum(node_num))).tolist()
+        sub_elements = [
+            {"type" : e["type"], "phys_tag" : e["phys_tag"], "node_tag" : tuple(local_tag[offsets[i]:offsets[i+1]])}
+            for i, e in enumerate(elements)
+        ]
+        mesh = Mesh.from_data(self.dim, self.PhysicalGroups, Nodes, sub_elements, self.index_dtype)
+        mesh.node_map = node_map
+        mesh.element_map = element_map
+        return mesh
+
     def write(self, filename:str)->None:
         """mshファイルの書き出し
 
@@ -120,7 +259,7 @@ class Mesh:
         Note:
             * ファイルフォーマットはversion 2.2
         """
-        with open(filename, "w") as file:
+        with instrument.phase("Mesh.write") as ph, open(filename, "w") as file:
             file.write("$MeshFormat\n")
             file.write("2.2 0 8\n")
             file.write("$EndMeshFormat\n")
@@ -135,23 +274,28 @@ class Mesh:
                     file.write(f"{dim} {idx+1} \"{name}\"\n")
                 file.write("$EndPhysicalNames\n")
             
-            file.write("$Nodes\n")
-            file.write(f"{len(self.Nodes)}\n")
-            for idx, node in enumerate(self.Nodes):
-                node_ex = np.concatenate((node, np.zeros(3-len(node))))
-                
-                file.write(f"{idx+1} {node_ex[0]} {node_ex[1]} {node_ex[2]}\n")
-            file.write("$EndNodes\n")
+            with instrument.phase("Nodes") as ph_node:
+                file.write("$Nodes\n")
+                file.write(f"{len(self.Nodes)}\n")
+                for idx, node in enumerate(self.Nodes):
+                    node_ex = np.concatenate((node, np.zeros(3-len(node), dtype = node.dtype)))
+                    
+                    file.write(f"{idx+1} {node_ex[0]} {node_ex[1]} {node_ex[2]}\n")
+                file.write("$EndNodes\n")
+                ph_node.add(count = len(self.Nodes))
             
-            file.write("$Elements\n")
-            file.write(f"{len(self.Elements)}\n")
-            for idx, element in enumerate(self.Elements):
-                e_type = element["type"]
-                phys_tag = element["phys_tag"]
-                node_tag = [n+1 for n in element["node_tag"]]
-                node_tag_str = ""
-                for n in node_tag:
-                    node_tag_str += f"{int(n)} "
-                node_tag_str = node_tag_str[:-1]+"\n"
-                file.write(f"{idx+1} {e_type} 2 {phys_tag} 1 {node_tag_str}")
-            file.write("$EndElements\n")
\ No newline at end of file
+            with instrument.phase("Elements") as ph_element:
+                file.write("$Elements\n")
+                file.write(f"{len(self.Elements)}\n")
+                for idx, element in enumerate(self.Elements):
+                    e_type = element["type"]
+                    phys_tag = element["phys_tag"]
+                    node_tag = [n+1 for n in element["node_tag"]]
+                    node_tag_str = ""
+                    for n in node_tag:
+                        node_tag_str += f"{int(n)} "
+                    node_tag_str = node_tag_str[:-1]+"\n"
+                    file.write(f"{idx+1} {e_type} 2 {phys_tag} 1 {node_tag_str}")
+                file.write("$EndElements\n")
+                ph_element.add(count = len(self.Elements))
+            ph.add(count = len(self.Nodes) + len(self.Elements), nbytes = file.tell())
\ No newline at end of file
@@ -75,4 +75,136 @@ def get_facet_normal(element:dict, mesh:Mesh)->tuple[np.ndarray]:
         facet_normal = [get_facet_normal_between_nodes(mesh, i, j) for i, j in zip(node_tags[:-1], node_tags[1:])]
         return tuple(facet_normal)
     else:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+def get_facet_nodes_csr(offsets:np.ndarray, node_tag:np.ndarray)->np.ndarray:
+    """CSR形式の接続情報から各ファセットを構成する節点タグを出力
+
+    Args:
+        offsets (np.ndarray): utils.get_connectivityのoffsets
+        node_tag (np.ndarray): utils.get_connectivityのnode_tag
+    Returns:
+        np.ndarray: ファセットの節点タグ。shapeは(2, F)でF == len(node_tag)。
+    Note:
+        * 2次元の多角形要素を仮定し、第k節点から次の節点へのエッジを第kファセットとする。
+    """
+    next_idx = np.arange(1, len(node_tag)+1)
+    next_idx[offsets[1:]-1] = offsets[:-1]
+    return np.stack((node_tag, node_tag[next_idx]), axis = 0)
+
+
+def get_centroids_csr(Nodes:np.ndarray, offsets:np.ndarray, node_tag:np.ndarray)->np.ndarray:
+    """CSR形式の接続情報から各要素の重心を出力
+
+    Args:
+        Nodes (np.ndarray): 節点座標。shapeは(N, D)。
+        offsets (np.ndarray): utils.get_connectivityのoffsets
+        node_tag (np.ndarray): utils.get_connectivityのnode_tag
+    Returns:
+        np.ndarray: 重心座標。shapeは(M, D)。
+    """
+    if len(offsets) == 1:
+        return np.zeros((0, Nodes.shape[1]))
+    return np.add.reduceat(Nodes[node_tag], offsets[:-1], axis = 0)/np.diff(offsets)[:,None]
+
+
+def get_volumes_csr(Nodes:np.ndarray, offsets:np.ndarray, node_tag:np.ndarray)->np.ndarray:
+    """CSR形式の接続情報から各要素の体積(2次元の場合は面積)を出力
+
+    Args:
+        Nodes (np.ndarray): 節点座標。shapeは(N, D)。
+        offsets (np.ndarray): utils.get_connectivityのoffsets
+        node_tag (np.ndarray): utils.get_connectivityのnode_tag
+    Returns:
+        np.ndarray: 体積(もしくは面積)。shapeは(M, )。
+    Note:
+        * get_volumeと同じ仮定を置く。
+    """
+    if Nodes.shape[1] == 2:
+        if len(offsets) == 1:
+            return np.zeros(0)
+        facet_nodes = get_facet_nodes_csr(offsets, node_tag)
+        x1, y1 = Nodes[facet_nodes[0]].T
+        x2, y2 = Nodes[facet_nodes[1]].T
+        return 0.5*np.add.reduceat((x1 - x2)*(y1 + y2), offsets[:-1])
+    else:
+        raise NotImplementedError
+
+
+def get_facet_normals_csr(Nodes:np.ndarray, facet_nodes:np.ndarray)->tuple[np.ndarray]:
+    """ファセットの節点タグから外向き単位法線ベクトルと面積(2次元の場合は長さ)を出力
+
+    Args:
+        Nodes (np.ndarray): 節点座標。shapeは(N, D)。
+        facet_nodes (np.ndarray): get_facet_nodes_csrの出力
+    Returns:
+        tuple[np.ndarray]: (法線ベクトル, 面積)。shapeはそれぞれ(F, D), (F, )。
+    """
+    if Nodes.shape[1] == 2:
+        d = Nodes[facet_nodes[1]] - Nodes[facet_nodes[0]]
+        l = np.linalg.norm(d, axis = 1)
+        n = np.stack((d[:,1], -d[:,0]), axis = 1)/l[:,None]
+        return n, l
+    else:
+        raise NotImplementedError
+
+
+def get_facet_nodes(mesh:Mesh)->np.ndarray:
+    """次元がmesh.dimの全要素のファセットを構成する節点タグを出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト
+    Returns:
+        np.ndarray: ファセットの節点タグ。shapeは(2, F)でFはファセット数。
+    Note:
+        * ファセットの順序はutils.get_connectivityのnode_tagと一致する。第i要素のファセットはoffsets[i]からoffsets[i+1]まで。
+        * 2次元の場合、節点が反時計回りの順に定義されていることを仮定
+    """
+    if mesh.dim == 2:
+        return get_facet_nodes_csr(*utils.get_connectivity(mesh, mesh.dim))
+    else:
+        raise NotImplementedError
+
+
+def get_centroids(mesh:Mesh)->np.ndarray:
+    """次元がmesh.dimの全要素の重心を一括で出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト
+    Returns:
+        np.ndarray: 重心座標。shapeは(M, D)でMは要素数。
+    """
+    return get_centroids_csr(mesh.Nodes, *utils.get_connectivity(mesh, mesh.dim))
+
+
+def get_volumes(mesh:Mesh)->np.ndarray:
+    """次元がmesh.dimの全要素の体積(2次元の場合は面積)を一括で出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト
+    Returns:
+        np.ndarray: 体積(もしくは面積)。shapeは(M, )でMは要素数。
+    Note:
+        * get_volumeと同じ仮定を置く。
+    """
+    if mesh.dim == 2:
+        return get_volumes_csr(mesh.Nodes, *utils.get_connectivity(mesh, mesh.dim))
+    else:
+        raise NotImplementedError
+
+
+def get_facet_normals(mesh:Mesh)->tuple[np.ndarray]:
+    """次元がmesh.dimの全要素の各ファセットの外向き単位法線ベクトルと面積(2次元の場合は長さ)を一括で出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト
+    Returns:
+        tuple[np.ndarray]: (法線ベクトル, 面積)。shapeはそれぞれ(F, D), (F, )。
+    Note:
+        * ファセットの順序はget_facet_nodesと一致する。
+        * get_facet_normalと同じ仮定を置く。
+    """
+    if mesh.dim == 2:
+        return get_facet_normals_csr(mesh.Nodes, get_facet_nodes(mesh))
+    else:
+        raise NotImplementedError
@@ -0,0 +1,86 @@
+import numpy as np
+import pivtk
+from meshu import utils, algorithm
+from meshu.core import Mesh
+from pivtk import instrument
+
+@instrument.timed(count = algorithm._count_elements)
+def get_edge_features(mesh:Mesh, double_direction:bool = False, float_dtype:type = None)->dict:
+    """グラフ学習用のエッジ特徴量及びノード特徴量を一括で出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト
+        double_direction (bool, optional): algorithm.get_adjacency_matrixのdouble_direction
+        float_dtype (type, optional): 浮動小数点型 (np.float32など)。Noneの場合はmesh.float_dtype。
+    Returns:
+        dict: 特徴量。keyは以下の通り。
+            * edge_index (np.ndarray): エッジリスト。shapeは(2, E)。
+            * edge_length (np.ndarray): エッジの長さ。shapeは(E, )。
+            * edge_direction (np.ndarray): 始点から終点への単位ベクトル。shapeは(E, D)。
+            * edge_tag (np.ndarray): エッジが属する境界のphys_tag。境界上でない場合は-1。shapeは(E, )。
+            * node_pos (np.ndarray): 節点座標。shapeは(N, D)。
+            * node_tag (np.ndarray): 節点が属する境界のphys_tag。境界上でない場合は-1。shapeは(N, )。
+            * node_degree (np.ndarray): 節点の次数。shapeは(N, )。double_directionによらずalgorithm.get_orderと同じ値。
+    Note:
+        * edge_tagはutils.get_phystag_COO、node_tagはutils.get_phystag_nodeと同じ値となる。
+    """
+    float_dtype = mesh.float_dtype if float_dtype is None else float_dtype
+    node_num = len(mesh.Nodes)
+    edge_index = algorithm.get_adjacency_matrix(mesh, double_direction = double_direction)
+
+    vector = mesh.Nodes[edge_index[1]] - mesh.Nodes[edge_index[0]]
+    edge_length = np.linalg.norm(vector, axis = 1)
+    edge_direction = vector / edge_length[:,np.newaxis]
+    edge_tag = utils.get_phystag_COO(mesh, edge_index)
+
+    #####get_phystag_nodeと同様、複数の境界に属する節点は後の要素のphys_tagとする
+    offsets, node_tag = utils.get_connectivity(mesh, mesh.dim-1)
+    boundary_tag = np.fromiter((e["phys_tag"] for e in utils.get_elements(mesh, mesh.dim-1)), dtype = np.int64, count = len(offsets)-1)
+    boundary_tag = np.repeat(boundary_tag, np.diff(offsets))
+    node_phys_tag = np.full(node_num, -1, dtype = np.int64)
+    node_phys_tag[node_tag] = boundary_tag
+
+    return {
+        "edge_index" : edge_index,
+        "edge_length" : edge_length.astype(float_dtype),
+        "edge_direction" : edge_direction.astype(float_dtype),
+        "edge_tag" : edge_tag,
+        "node_pos" : mesh.Nodes.astype(float_dtype),
+        "node_tag" : node_phys_tag,
+        "node_degree" : np.bincount(edge_index[0] if double_direction else edge_index.ravel(), minlength = node_num).astype(mesh.index_dtype),
+    }
+
+
+def save(filename:str, features:dict)->None:
+    """get_edge_featuresの出力を.npzファイルに保存
+
+    Args:
+        filename (str): ファイル名
+        features (dict): get_edge_featuresの出力
+    """
+    np.savez(filename, **features)
+
+
+def load(filename:str)->dict:
+    """saveで保存した特徴量を読み込む
+    """
+    with np.load(filename) as arrays:
+        return {name : arrays[name] for name in arrays.files}
+
+
+def get_graph(features:dict)->pivtk.geom.graph:
+    """get_edge_featuresの出力をVTK_LINEからなるジオメトリに変換
+
+    Args:
+        features (dict): get_edge_featuresの出力
+    Returns:
+        pivtk.geom.graph: ジオメトリ。edge_*はセルデータ、node_tag及びnode_degreeはポイントデータとなる。
+    Note:
+        * 整数の特徴量も含め、すべてのデータをedge_lengthと同じ浮動小数点型で書き出す。
+    """
+    grid = pivtk.geom.graph(points = features["node_pos"], edges = features["edge_index"], float_dtype = features["edge_length"].dtype.type)
+    for name in ("node_tag", "node_degree"):
+        grid.add_pointdata(name, features[name])
+    for name in ("edge_length", "edge_direction", "edge_tag"):
+        grid.add_celldata(name, features[name])
+    return grid
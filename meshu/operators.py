@@ -0,0 +1,185 @@
+import numpy as np
+from meshu import utils, algorithm, geom
+from meshu.core import Mesh
+import hashlib
+import os
+from scipy.sparse import csr_matrix, diags
+
+def get_laplacian(mesh:Mesh)->csr_matrix:
+    """グラフラプラシアン L = D - A を出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。
+    Returns:
+        csr_matrix: グラフラプラシアン。shapeは(N, N)。
+    Note:
+        * 隣接関係はalgorithm.get_adjacency_matrixに従う。
+    """
+    node_num = len(mesh.Nodes)
+    A = algorithm.get_adjacency_matrix(mesh, double_direction = True)
+    A = csr_matrix((np.ones(A.shape[1]), (A[0], A[1])), shape = (node_num, node_num))
+    degree = np.asarray(A.sum(axis = 1)).ravel()
+
+    return (diags(degree) - A).tocsr()
+
+
+def get_mass_matrix(mesh:Mesh)->csr_matrix:
+    """集中化質量行列を出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。
+    Returns:
+        csr_matrix: 対角の集中化質量行列。shapeは(N, N)。
+    Note:
+        * 各要素の体積を構成節点に等分配する。
+    """
+    offsets, _ = utils.get_connectivity(mesh, mesh.dim)
+    V = geom.get_volumes(mesh)
+    incidence = algorithm.get_node_element_incidence(mesh)
+    m = incidence @ (V/np.diff(offsets))
+
+    return diags(m).tocsr()
+
+
+def get_gradient_operator(mesh:Mesh)->tuple[csr_matrix]:
+    """節点値から要素平均勾配を求めるGreen-Gauss型の勾配演算子を出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。
+    Returns:
+        tuple[csr_matrix]: 各軸方向の勾配演算子。各shapeは(M, N)でMは次元がmesh.dimの要素数。
+    Note:
+        * ファセット値は両端節点値の算術平均とする。線形場に対して厳密。
+        * 第d成分の勾配はG[d] @ node_values で得られる。
+    """
+    node_num = len(mesh.Nodes)
+    offsets, _ = utils.get_connectivity(mesh, mesh.dim)
+    element_num = len(offsets) - 1
+    V = geom.get_volumes(mesh)
+    facet_nodes = geom.get_facet_nodes(mesh)
+    n, l = geom.get_facet_normals(mesh)
+
+    facet_element = np.repeat(np.arange(element_num), np.diff(offsets))
+    rows = np.concatenate((facet_element, facet_element))
+    cols = np.concatenate((facet_nodes[0], facet_nodes[1]))
+    G = []
+    for d in range(mesh.dim):
+        w = 0.5*n[:,d]*l/V[facet_element]
+        G.append(csr_matrix((np.concatenate((w, w)), (rows, cols)), shape = (element_num, node_num)))
+
+    return tuple(G)
+
+
+def assemble(mesh:Mesh)->dict:
+    """離散演算子を一括で組み立てる
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。
+    Returns:
+        dict: 演算子の辞書。keyは以下の通り。
+            * laplacian: get_laplacianの出力
+            * mass: get_mass_matrixの出力
+            * gradient_{d}: get_gradient_operatorの第d成分
+            * cell2node: algorithm.get_cell2node_matrixの出力
+    """
+    operators = {
+        "laplacian" : get_laplacian(mesh),
+        "mass" : get_mass_matrix(mesh),
+        "cell2node" : algorithm.get_cell2node_matrix(mesh),
+    }
+    for d, G in enumerate(get_gradient_operator(mesh)):
+        operators[f"gradient_{d}"] = G
+
+    return operators
+
+
+def get_signature(mesh:Mesh)->str:
+    """節点座標と接続情報から求めたハッシュ値を出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。
+    Returns:
+        str: ハッシュ値。キャッシュの整合性確認に用いる。
+    """
+    offsets, node_tag = utils.get_connectivity(mesh, mesh.dim)
+    h = hashlib.sha1()
+    for array in (np.ascontiguousarray(mesh.Nodes), offsets, node_tag):
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+
+def save(filename:str, operators:dict, signature:str = "")->None:
+    """演算子をnpzファイルに保存
+
+    Args:
+        filename (str): ファイル名
+        operators (dict): 演算子の辞書
+        signature (str, optional): get_signatureの出力
+    """
+    arrays = {"signature" : np.array(signature)}
+    for name, M in operators.items():
+        M = M.tocsr()
+        arrays[f"{name}/data"] = M.data
+        arrays[f"{name}/indices"] = M.indices
+        arrays[f"{name}/indptr"] = M.indptr
+        arrays[f"{name}/shape"] = np.array(M.shape)
+    with open(filename, "wb") as file:
+        np.savez(file, **arrays)
+
+
+def load(filename:str)->tuple:
+    """npzファイルから演算子を読み込む
+
+    Args:
+        filename (str): ファイル名
+    Returns:
+        tuple: (演算子の辞書, signature)
+    """
+    operators = {}
+    with np.load(filename) as arrays:
+        signature = str(arrays["signature"])
+        names = sorted({key.rsplit("/", 1)[0] for key in arrays.files if "/" in key})
+        for name in names:
+            operators[name] = csr_matrix(
+                (arrays[f"{name}/data"], arrays[f"{name}/indices"], arrays[f"{name}/indptr"]),
+                shape = tuple(arrays[f"{name}/shape"])
+                )
+    return operators, signature
+
+
+def get_cache_filename(mesh:Mesh)->str:
+    """メッシュファイルと同じディレクトリに置くキャッシュファイル名を出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。
+    Returns:
+        str: キャッシュファイル名。"sample.msh"の場合"sample.operators.npz"。
+    """
+    return os.path.splitext(mesh.filename)[0] + ".operators.npz"
+
+
+def get_operators(mesh:Mesh, cache:bool = True)->dict:
+    """離散演算子を出力。キャッシュが有効であれば読み込み、無ければ組み立てて保存する。
+
+    Args:
+        mesh (Mesh): Meshオブジェクト。
+        cache (bool, optional): Trueの場合、get_cache_filenameのファイルを利用する。
+    Returns:
+        dict: assembleと同じ演算子の辞書。
+    Note:
+        * 節点座標や接続情報が変更された場合(renumbering_nodeなど)、signatureの不一致により組み立て直す。
+        * mesh.filenameがNoneの場合(Mesh.from_data, Mesh.submeshなど)、キャッシュは使わずに組み立てる。
+    """
+    if not cache or mesh.filename is None:
+        return assemble(mesh)
+
+    filename = get_cache_filename(mesh)
+    signature = get_signature(mesh)
+    if os.path.exists(filename):
+        operators, cached_signature = load(filename)
+        if cached_signature == signature:
+            return operators
+
+    operators = assemble(mesh)
+    save(filename, operators, signature)
+    return operators
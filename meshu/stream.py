@@ -0,0 +1,235 @@
+import numpy as np
+from meshu import config, geom
+import itertools
+import re
+
+def seek_section(file, name:str)->int:
+    """ファイルを指定セクションの直後まで読み進め、セクションの項目数を出力
+
+    Args:
+        file: テキストモードで開いたmshファイル
+        name (str): セクション名 ("$Nodes"など)
+    Returns:
+        int: セクションの項目数 (セクション名の次の行)
+    """
+    for line in file:
+        if line.rstrip("\n") == name:
+            return int(next(file))
+    raise ValueError(f"{name} is not found")
+
+
+def read_lines(file, num:int)->str:
+    """ファイルからnum行を読み、連結した文字列を出力
+    """
+    return "".join(itertools.islice(file, num))
+
+
+def read_PhysicalGroups(filename:str)->list[dict]:
+    """PhysicalGroupのリストを出力。形式はMesh.PhysicalGroupsと同じ。
+
+    Args:
+        filename (str): mshファイル名
+    Returns:
+        list[dict]: PhysicalGroupのリスト。$PhysicalNamesがない場合は空のリスト。
+    """
+    physical_groups = []
+    with open(filename, "r") as file:
+        for line in file:
+            if line.rstrip("\n") == "$PhysicalNames":
+                break
+            if line.rstrip("\n") == "$Nodes":
+                return physical_groups
+        else:
+            return physical_groups
+
+        for _ in range(int(next(file))):
+            phys_info = re.split("[ \t]", next(file).rstrip("\n"))
+            physical_groups.append({"dim":int(phys_info[0]), "name":phys_info[2][1:-1]})
+    return physical_groups
+
+
+def iter_nodes(filename:str, dim:int, chunk_size:int = 100000):
+    """$Nodesセクションを固定サイズのチャンクごとに読み込む
+
+    Args:
+        filename (str): mshファイル名
+        dim (int): 次元
+        chunk_size (int, optional): 1チャンクあたりの節点数
+    Yields:
+        np.ndarray: 節点座標。shapeは(K, dim)でK <= chunk_size。
+    Note:
+        * Mesh.Nodesと同様、節点タグは1から始まり連続していることを仮定する。
+    """
+    with open(filename, "r") as file:
+        node_num = seek_section(file, "$Nodes")
+        for start in range(0, node_num, chunk_size):
+            num = min(chunk_size, node_num - start)
+            table = np.fromstring(read_lines(file, num), dtype = float, sep = " ").reshape((num, 4))
+            assert np.all(table[:,0] == np.arange(start + 1, start + num + 1)), "Tag of Nodes should be dense"
+            yield table[:,1:1+dim]
+
+
+def read_nodes(filename:str, dim:int, chunk_size:int = 100000, out:np.ndarray = None, float_dtype:type = np.float64)->np.ndarray:
+    """全節点の座標をチャンクごとに読み込み、1つの配列に格納する
+
+    Args:
+        filename (str): mshファイル名
+        dim (int): 次元
+        chunk_size (int, optional): 1チャンクあたりの節点数
+        out (np.ndarray, optional): 格納先。np.memmapを渡すとディスク上に格納できる。
+        float_dtype (type, optional): outがNoneの場合に確保する配列の型
+    Returns:
+        np.ndarray: 節点座標。shapeは(N, dim)。
+    """
+    if out is None:
+        with open(filename, "r") as file:
+            out = np.empty((seek_section(file, "$Nodes"), dim), dtype = float_dtype)
+    start = 0
+    for nodes in iter_nodes(filename, dim, chunk_size):
+        out[start:start+len(nodes)] = nodes
+        start += len(nodes)
+    return out
+
+
+def parse_elements(text:str, num:int, start:int)->dict:
+    """$Elementsセクションのnum行分の文字列をCSR形式の要素情報に変換
+
+    Args:
+        text (str): num行分の文字列
+        num (int): 行数
+        start (int): 先頭要素のタグ (ゼロ始まり)
+    Returns:
+        dict: 要素情報のチャンク。keyは以下の通り。
+            * element_tag (np.ndarray): 要素タグ (ゼロ始まり)。shapeは(K, )。
+            * type (np.ndarray): 要素タイプ。shapeは(K, )。
+            * phys_tag (np.ndarray): PhysicalGroupのタグ (ゼロ始まり)。shapeは(K, )。
+            * offsets (np.ndarray): shapeは(K+1, )。utils.get_connectivityと同じ規約。
+            * node_tag (np.ndarray): 節点タグ (ゼロ始まり)。
+    Note:
+        * Mesh.read_Elementsと同様、各行の値は1文字の空白もしくはタブで区切られていることを仮定する。
+    """
+    chars = np.frombuffer(text.encode("ascii"), dtype = np.uint8)
+    separator_num = np.cumsum((chars == ord(" ")) | (chars == ord("\t")))[chars == ord("\n")]
+    lengths = np.diff(separator_num, prepend = 0) + 1
+    assert len(lengths) == num
+    flat = np.fromstring(text, dtype = np.int64, sep = " ")
+    row = np.concatenate((np.zeros(1, dtype = np.int64), np.cumsum(lengths)))
+
+    element_tag = flat[row[:-1]] - 1
+    assert np.all(element_tag == np.arange(start, start + num)), "Tag of Element should be dense"
+    e_type = flat[row[:-1]+1]
+    tag_num = flat[row[:-1]+2]
+    phys_tag = flat[row[:-1]+3] - 1
+
+    node_num = lengths - 3 - tag_num
+    offsets = np.concatenate((np.zeros(1, dtype = np.int64), np.cumsum(node_num)))
+    node_pos = np.arange(offsets[-1]) - np.repeat(offsets[:-1], node_num) + np.repeat(row[:-1] + 3 + tag_num, node_num)
+    node_tag = flat[node_pos] - 1
+
+    return {"element_tag" : element_tag, "type" : e_type, "phys_tag" : phys_tag, "offsets" : offsets, "node_tag" : node_tag}
+
+
+def select_elements(chunk:dict, mask:np.ndarray)->dict:
+    """要素情報のチャンクからmaskがTrueの要素を取り出す
+
+    Args:
+        chunk (dict): parse_elementsの出力
+        mask (np.ndarray): 要素ごとのbool配列
+    Returns:
+        dict: parse_elementsと同じ形式のチャンク
+    """
+    node_num = np.diff(chunk["offsets"])
+    offsets = np.concatenate((np.zeros(1, dtype = np.int64), np.cumsum(node_num[mask])))
+    node_tag = chunk["node_tag"][np.repeat(mask, node_num)]
+    selected = {key : chunk[key][mask] for key in ("element_tag", "type", "phys_tag")}
+    selected.update({"offsets" : offsets, "node_tag" : node_tag})
+    return selected
+
+
+def iter_elements(filename:str, dim:int = None, chunk_size:int = 100000):
+    """$Elementsセクションを固定サイズのチャンクごとに読み込む
+
+    Args:
+        filename (str): mshファイル名
+        dim (int, optional): 要素の次元。指定した場合、utils.pickup_elementtagと同様に次元がdimの要素のみを出力する。
+        chunk_size (int, optional): 1チャンクあたりに読み込む要素数
+    Yields:
+        dict: parse_elementsと同じ形式のチャンク。dimを指定した場合、要素数はchunk_size以下となる。
+    """
+    with open(filename, "r") as file:
+        element_num = seek_section(file, "$Elements")
+        for start in range(0, element_num, chunk_size):
+            num = min(chunk_size, element_num - start)
+            chunk = parse_elements(read_lines(file, num), num, start)
+            if dim is not None:
+                chunk = select_elements(chunk, np.isin(chunk["type"], config.element_types[dim]))
+            yield chunk
+
+
+def iter_volumes(filename:str, Nodes:np.ndarray, chunk_size:int = 100000):
+    """次元がNodes.shape[1]の要素の体積(2次元の場合は面積)をチャンクごとに出力
+
+    Args:
+        filename (str): mshファイル名
+        Nodes (np.ndarray): read_nodesの出力
+        chunk_size (int, optional): 1チャンクあたりに読み込む要素数
+    Yields:
+        tuple[np.ndarray]: (要素タグ, 体積)
+    """
+    for chunk in iter_elements(filename, Nodes.shape[1], chunk_size):
+        yield chunk["element_tag"], geom.get_volumes_csr(Nodes, chunk["offsets"], chunk["node_tag"])
+
+
+def iter_centroids(filename:str, Nodes:np.ndarray, chunk_size:int = 100000):
+    """次元がNodes.shape[1]の要素の重心をチャンクごとに出力
+
+    Args:
+        filename (str): mshファイル名
+        Nodes (np.ndarray): read_nodesの出力
+        chunk_size (int, optional): 1チャンクあたりに読み込む要素数
+    Yields:
+        tuple[np.ndarray]: (要素タグ, 重心座標)
+    """
+    for chunk in iter_elements(filename, Nodes.shape[1], chunk_size):
+        yield chunk["element_tag"], geom.get_centroids_csr(Nodes, chunk["offsets"], chunk["node_tag"])
+
+
+def get_total_volume(filename:str, dim:int, chunk_size:int = 100000, float_dtype:type = np.float64, out:np.ndarray = None)->float:
+    """全要素の体積(2次元の場合は面積)の総和を有界なメモリで計算
+
+    Args:
+        filename (str): mshファイル名
+        dim (int): 次元
+        chunk_size (int, optional): 1チャンクあたりに読み込む節点数及び要素数
+        float_dtype (type, optional): 節点座標の型
+        out (np.ndarray, optional): 節点座標の格納先 (read_nodesのout)。shapeは(N, dim)。
+    Returns:
+        float: 体積の総和
+    Note:
+        * 節点座標(N×dim)のみを保持し、要素はチャンクごとに処理する。
+        * outにnp.memmapを渡すと節点座標もディスク上に置くため、メモリに収まらないメッシュにも用いることができる。
+    """
+    Nodes = read_nodes(filename, dim, chunk_size, out = out, float_dtype = float_dtype)
+    return float(sum(V.sum() for _, V in iter_volumes(filename, Nodes, chunk_size)))
+
+
+def count_physical_groups(filename:str, dim:int = None, chunk_size:int = 100000)->np.ndarray:
+    """PhysicalGroupごとの要素数を有界なメモリで計算
+
+    Args:
+        filename (str): mshファイル名
+        dim (int, optional): 要素の次元。Noneの場合すべての要素。
+        chunk_size (int, optional): 1チャンクあたりに読み込む要素数
+    Returns:
+        np.ndarray: 要素数。第i成分はPhysicalGroups[i]に属する要素数。
+    Note:
+        * PhysicalGroupに属さない要素(mshファイル上のphysical tagが0、phys_tagが-1)は数えない。
+    """
+    count = np.zeros(len(read_PhysicalGroups(filename)), dtype = np.int64)
+    for chunk in iter_elements(filename, dim, chunk_size):
+        phys_tag = chunk["phys_tag"]
+        c = np.bincount(phys_tag[phys_tag >= 0], minlength = len(count))
+        if len(c) > len(count):
+            count = np.concatenate((count, np.zeros(len(c) - len(count), dtype = np.int64)))
+        count += c
+    return count
@@ -2,6 +2,7 @@ import numpy as np
 from meshu import config
 from meshu.core import Mesh
 import pivtk
+import itertools
 import sys
 
 def pickup_elementtag(mesh:Mesh, dim:int)->tuple[int]:
@@ -37,6 +38,28 @@ def get_elements(mesh:Mesh, dim:int)->tuple[dict]:
     return elements
 
 
+def get_connectivity(mesh:Mesh, dim:int = None)->tuple[np.ndarray]:
+    """次元がdimの要素の接続情報をCSR形式で出力
+
+    Args:
+        mesh (Mesh): Meshオブジェクト
+        dim (int, optional): 次元。Noneの場合すべての要素を対象とする。
+    Returns:
+        tuple[np.ndarray]: (offsets, node_tag)。offsetsのshapeは(M+1, )でMは該当要素数。
+    Note:
+        * 要素の順序はpickup_elementtagの出力順(dim is Noneの場合はmesh.Elementsの順)と一致する。
+        * 第i要素を構成する節点タグはnode_tag[offsets[i]:offsets[i+1]]。
+        * node_tagの型はmesh.index_dtype。
+    """
+    elements = mesh.Elements if dim is None else get_elements(mesh, dim)
+    node_num = np.fromiter((len(e["node_tag"]) for e in elements), dtype = np.int64, count = len(elements))
+    offsets = np.concatenate((np.zeros(1, dtype = np.int64), np.cumsum(node_num)))
+    offsets = offsets.astype(config.get_index_dtype(offsets[-1]), copy = False)
+    node_tag = np.fromiter(itertools.chain.from_iterable(e["node_tag"] for e in elements), dtype = mesh.index_dtype, count = offsets[-1])
+
+    return offsets, node_tag
+
+
 def get_physical_names(mesh:Mesh, dim:int = None)->tuple[str]:
     """次元がdimのPhysicalGroupの名前を出力
 
@@ -64,10 +87,11 @@ def Graph2UnstructuredGrid(V:np.ndarray, E:np.ndarray)->pivtk.geom.unstructured_
         V (np.ndarray): ノード座標値。
         E (np.ndarray): 隣接行列。
     Returns:
-        geom.unstructured_grid: unstructured gridジオメトリ
+        geom.graph: unstructured gridジオメトリ (セルはVTK_LINE)
+    Note:
+        * エッジごとのオブジェクトは作成せず、配列のまま保持・書き出しする。
     """
-    cells = [{"type" : 3, "indice" : np.array([e_st,e_fn])} for e_st, e_fn in zip(E[0], E[1])]
-    return pivtk.geom.unstructured_grid(points = V, cells = tuple(cells))
+    return pivtk.geom.graph(points = V, edges = E)
 
 
 def get_phystag_node(mesh:Mesh)->np.ndarray:
@@ -135,8 +159,23 @@ def get_phystag_COO(mesh:Mesh, COO:np.ndarray, except_val:int = -1)->np.ndarray:
 
     Returns:
         np.ndarray: phys tag。
+    Note:
+        * エッジの向きは区別しない。同じエッジを持つ1次元要素が複数ある場合は最初の要素のphys_tagを用いる。
     """
-    phys_tag = np.array([get_phystag_between_nodes(mesh, i, j, except_val) for i, j in zip(COO[0], COO[1])])
+    offsets, node_tag = get_connectivity(mesh, 1)
+    boundary_tag = np.fromiter((e["phys_tag"] for e in get_elements(mesh, 1)), dtype = np.int64, count = len(offsets)-1)
+    boundary = node_tag.reshape((-1, 2)).astype(np.int64)
+    node_num = len(mesh.Nodes)
+
+    boundary_key = boundary.min(axis = 1)*node_num + boundary.max(axis = 1)
+    unique_key, first = np.unique(boundary_key, return_index = True)
+    COO = np.asarray(COO, dtype = np.int64)
+    key = np.minimum(COO[0], COO[1])*node_num + np.maximum(COO[0], COO[1])
+
+    pos = np.minimum(np.searchsorted(unique_key, key), max(len(unique_key)-1, 0))
+    found = unique_key[pos] == key if len(unique_key) > 0 else np.zeros(len(key), dtype = bool)
+    phys_tag = np.full(len(key), except_val, dtype = np.int64)
+    phys_tag[found] = boundary_tag[first[pos[found]]]
     return phys_tag
 
 def isin_COO(COO:np.ndarray, i:int, j:int)->bool:
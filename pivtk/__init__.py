@@ -1,2 +1,3 @@
 from pivtk.geom import *
-from pivtk.In import read
\ No newline at end of file
+from pivtk.In import read
+from pivtk import instrument
\ No newline at end of file
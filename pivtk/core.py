@@ -1,5 +1,7 @@
 import numpy as np
 from copy import deepcopy
+from pivtk import instrument
+import os
 
 class version2:
     """VTK version2を管理する抽象クラス
@@ -13,11 +15,15 @@ class version2:
             "values" (np.ndarray): 数値データ。スカラーの場合shapeは(N, )、スカラーの場合は(N, D)。
             "type" (str): "scalar"もしくは"vector"
         cell_data (list[str]): セルデータのリスト。各要素はdictで、key及びvaluesは同上。
+        float_dtype (type): 書き出し時の浮動小数点型 (np.float32もしくはnp.float64)。Noneの場合は配列ごとに、float32ならfloat32、それ以外はfloat64とする。
     """
     geom_type = None
-    def __init__(self, point_data:list[dict] = [], cell_data:list[dict] = [])->None:
+    #####浮動小数点型とVTKのデータ型名の対応
+    vtk_types = {np.dtype(np.float32) : "float", np.dtype(np.float64) : "double"}
+    def __init__(self, point_data:list[dict] = [], cell_data:list[dict] = [], float_dtype:type = None)->None:
         self.point_data = deepcopy(point_data)
         self.cell_data = deepcopy(cell_data)
+        self.float_dtype = float_dtype
     
     @property
     def dim(self)->int:
@@ -63,15 +69,39 @@ class version2:
         else:
             self.cell_data.append({"name" : name, "values" : values, "type" : "vector"})
     
-    def write_dataset(self, filename:str)->None:
+    def write_dataset(self, filename:str, binary:bool = False)->None:
         raise NotImplementedError
     
-    def write_scalar(self, name : str, values : np.ndarray, filename : str)->None:
+    def get_float_dtype(self, values : np.ndarray)->np.dtype:
+        """valuesの書き出しに用いる浮動小数点型を出力
+        """
+        if self.float_dtype is not None:
+            return np.dtype(self.float_dtype)
+        return np.dtype(np.float32) if np.asarray(values).dtype == np.float32 else np.dtype(np.float64)
+    
+    def write_binary(self, values : np.ndarray, filename : str, dtype : str = ">f4")->None:
+        """数値データをビッグエンディアンのバイナリ列として追記する
+
+        Args:
+            values (np.ndarray): 数値データ
+            filename (str): ファイル名
+            dtype (str, optional): 書き出すデータ型
+        """
+        with open(filename, "ab") as file:
+            file.write(np.ascontiguousarray(values, dtype = dtype).tobytes())
+            file.write(b"\n")
+    
+    def write_scalar(self, name : str, values : np.ndarray, filename : str, binary : bool = False)->None:
+        dtype = self.get_float_dtype(values)
+        values = np.asarray(values).astype(dtype, copy = False)
         with open(filename, "a") as file:
-            file.write("SCALARS {} float 1\n".format(name))
+            file.write("SCALARS {} {} 1\n".format(name, self.vtk_types[dtype]))
             file.write("LOOKUP_TABLE default\n")
-            for v in values:
-                file.write("{}\n".format(v))
+            if not binary:
+                for v in values:
+                    file.write(str(v) + "\n")
+        if binary:
+            self.write_binary(values, filename, dtype.newbyteorder(">"))
     
     def np2str(self, L : np.ndarray)->str:
         s = str(L[0])
@@ -80,47 +110,62 @@ class version2:
         
         return s + "\n"
     
-    def write_vector(self, name : str, values : np.ndarray, filename : str)->None:
-        _values = np.concatenate((values, np.zeros((len(values), 1))), axis = 1) if self.dim == 2 else values
+    def write_vector(self, name : str, values : np.ndarray, filename : str, binary : bool = False)->None:
+        dtype = self.get_float_dtype(values)
+        _values = np.concatenate((values, np.zeros((len(values), 1))), axis = 1) if values.shape[1] == 2 else values
+        _values = _values.astype(dtype, copy = False)
         
         with open(filename, "a") as file:
-            file.write("VECTORS {} float\n".format(name))
-            for v in _values:
-                file.write(self.np2str(v))
+            file.write("VECTORS {} {}\n".format(name, self.vtk_types[dtype]))
+            if not binary:
+                for v in _values:
+                    file.write(self.np2str(v))
+        if binary:
+            self.write_binary(_values, filename, dtype.newbyteorder(">"))
 
-    def write_pointdata(self, filename : str)->None:
+    def write_pointdata(self, filename : str, binary : bool = False)->None:
         if not self.point_data: return
         with open(filename, "a") as file:
             file.write("POINT_DATA {}\n".format(self.num_points))
         
         for point_data in self.point_data:
             if point_data["type"] == "scalar":
-                self.write_scalar(point_data["name"], point_data["values"], filename)
+                self.write_scalar(point_data["name"], point_data["values"], filename, binary)
             else:
-                self.write_vector(point_data["name"], point_data["values"], filename)
+                self.write_vector(point_data["name"], point_data["values"], filename, binary)
 
-    def write_celldata(self, filename : str)->None:
+    def write_celldata(self, filename : str, binary : bool = False)->None:
         if not self.cell_data: return
         with open(filename, "a") as file:
             file.write("CELL_DATA {}\n".format(self.num_cells))
 
         for cell_data in self.cell_data:
             if cell_data["type"] == "scalar":
-                self.write_scalar(cell_data["name"], cell_data["values"], filename)
+                self.write_scalar(cell_data["name"], cell_data["values"], filename, binary)
             else:
-                self.write_vector(cell_data["name"], cell_data["values"], filename)
+                self.write_vector(cell_data["name"], cell_data["values"], filename, binary)
 
-    def write(self, filename : str)->None:
+    def write(self, filename : str, binary : bool = False)->None:
         """VTKファイルを出力
 
         Args:
             filename (str): ファイル名
+            binary (bool, optional): Trueの場合、数値データをバイナリ(ビッグエンディアン)で出力する。
         """
-        with open(filename, "w") as file:
-            file.write("# vtk DataFile Version 2.0\n")
-            file.write("VTKio\n")
-            file.write("ASCII\n")
-            file.write("DATASET {}\n".format(self.geom_type))
-        self.write_dataset(filename)
-        self.write_pointdata(filename)
-        self.write_celldata(filename)
\ No newline at end of file
+        with instrument.phase("version2.write") as ph:
+            with open(filename, "w") as file:
+                file.write("# vtk DataFile Version 2.0\n")
+                file.write("VTKio\n")
+                file.write("BINARY\n" if binary else "ASCII\n")
+                file.write("DATASET {}\n".format(self.geom_type))
+            with instrument.phase("dataset") as ph_dataset:
+                self.write_dataset(filename, binary)
+                ph_dataset.add(count = self.num_points + self.num_cells)
+            with instrument.phase("pointdata") as ph_point:
+                self.write_pointdata(filename, binary)
+                ph_point.add(count = len(self.point_data))
+            with instrument.phase("celldata") as ph_cell:
+                self.write_celldata(filename, binary)
+                ph_cell.add(count = len(self.cell_data))
+            if ph:
+                ph.add(count = self.num_points + self.num_cells, nbytes = os.path.getsize(filename))
\ No newline at end of file
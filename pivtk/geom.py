@@ -1,5 +1,7 @@
 import numpy as np
+import base64
 from pivtk.core import version2
+from pivtk import instrument
 
 class structured_points(version2):
     """Object for STRUCTUREDMESH
@@ -10,8 +12,8 @@ class structured_points(version2):
         spacing (tuple[float]): Growth rate at each axis
     """
     geom_type = "STRUCTURED_POINTS"
-    def __init__(self, num_grids:tuple[int], origin:tuple[float] = None, spacing:tuple[float] = None, point_data:list[dict] = [], cell_data:list[dict] = [])->None:
-        super().__init__(point_data, cell_data)
+    def __init__(self, num_grids:tuple[int], origin:tuple[float] = None, spacing:tuple[float] = None, point_data:list[dict] = [], cell_data:list[dict] = [], float_dtype:type = None)->None:
+        super().__init__(point_data, cell_data, float_dtype)
         self.num_grids = num_grids
         self.origin = (0.,)*self.dim if origin is None else origin
         self.spacing = (1., )*self.dim if spacing is None else spacing
@@ -44,29 +46,18 @@ class structured_points(version2):
             self.cell_data.append({"name" : name, "values" : values, "type" : "vector"})
 
     
-    def write_scalar(self, name : str, values : np.ndarray, filename : str)->None:
+    def write_scalar(self, name : str, values : np.ndarray, filename : str, binary : bool = False)->None:
         _values = (values.T).flatten()
-        with open(filename, "a") as file:
-            file.write("SCALARS {} float 1\n".format(name))
-            file.write("LOOKUP_TABLE default\n")
-            for v in _values:
-                file.write("{}\n".format(v))
+        super().write_scalar(name, _values, filename, binary)
     
-    def write_vector(self, name : str, values : np.ndarray, filename : str)->None:
+    def write_vector(self, name : str, values : np.ndarray, filename : str, binary : bool = False)->None:
         if self.dim == 2:
             _values = (values.transpose((1, 0, 2))).reshape((-1, 2))
-            _values = np.concatenate(
-                (_values, np.zeros((len(_values), 1))),
-                axis = 1
-                )
         else:
             _values = (values.transpose((2, 1, 0, 3))).reshape((-1, 3))
-        with open(filename, "a") as file:
-            file.write("VECTORS {} float\n".format(name))
-            for v in _values:
-                file.write(self.np2str(v))
+        super().write_vector(name, _values, filename, binary)
     
-    def write_dataset(self, filename : str)->None:
+    def write_dataset(self, filename : str, binary : bool = False)->None:
         if self.dim == 2:
             num_grids = (self.num_grids[0], self.num_grids[1], 1)
             origin = (self.origin[0], self.origin[1], 0.)
@@ -90,6 +81,7 @@ class unstructured_grid(version2):
         cells (tuple[dict]): Information of each cells. This keys are "type" and "indice", where
             "type" (int): cell's tag
             "indice" (np.ndarray) point index array
+        float_dtype (type, optional): Floating point type used for writing. If None, float32 for float32 arrays and float64 otherwise
     Attributes:
         points (np.ndarray): Coordinates of each points
         cells (tuple[dict]): Information of each cells. This keys are "type" and "indice", where
@@ -97,8 +89,8 @@ class unstructured_grid(version2):
             "indice" (np.ndarray) point index array
     """
     geom_type = "UNSTRUCTURED_GRID"
-    def __init__(self, points : np.ndarray, cells : tuple, point_data:list[dict] = [], cell_data:list[dict] = [])->None:
-        super().__init__(point_data, cell_data)
+    def __init__(self, points : np.ndarray, cells : tuple, point_data:list[dict] = [], cell_data:list[dict] = [], float_dtype:type = None)->None:
+        super().__init__(point_data, cell_data, float_dtype)
         self.points = points
         self.cells = cells
     
@@ -109,10 +101,41 @@ class unstructured_grid(version2):
     @property
     def num_cells(self) -> int: return len(self.cells)
 
-    def write_dataset(self, filename : str)->None:
+    def get_connectivity(self)->tuple[np.ndarray]:
+        """セルの接続情報を連結した配列として出力
+
+        Returns:
+            tuple[np.ndarray]: (connectivity, offsets, types)。offsets[i]は第i+1セルの開始位置(VTU形式の規約)。
+        """
+        sizes = np.fromiter((len(cell["indice"]) for cell in self.cells), dtype = np.int64, count = self.num_cells)
+        offsets = np.cumsum(sizes)
+        connectivity = np.concatenate([cell["indice"] for cell in self.cells]) if self.num_cells > 0 else np.zeros(0, dtype = np.int64)
+        index_dtype = np.int32 if max(offsets[-1] if self.num_cells > 0 else 0, self.num_points) < np.iinfo(np.int32).max else np.int64
+        connectivity = connectivity.astype(index_dtype, copy = False)
+        offsets = offsets.astype(index_dtype)
+        types = np.fromiter((cell["type"] for cell in self.cells), dtype = np.int64, count = self.num_cells)
+        return connectivity, offsets, types
+
+    def write_dataset(self, filename : str, binary : bool = False)->None:
+        dtype = self.get_float_dtype(self.points)
         points = np.concatenate((self.points, np.zeros((self.num_points, 1))), axis = 1) if self.dim == 2 else self.points
+        points = points.astype(dtype, copy = False)
+        if binary:
+            connectivity, offsets, types = self.get_connectivity()
+            cells = np.insert(connectivity, np.concatenate(([0], offsets[:-1])), np.diff(offsets, prepend = 0))
+            with open(filename, "a") as file:
+                file.write("POINTS {} {}\n".format(self.num_points, self.vtk_types[dtype]))
+            self.write_binary(points, filename, dtype.newbyteorder(">"))
+            with open(filename, "a") as file:
+                file.write("CELLS {0} {1}\n".format(self.num_cells, len(cells)))
+            self.write_binary(cells, filename, ">i4")
+            with open(filename, "a") as file:
+                file.write("CELL_TYPES {}\n".format(self.num_cells))
+            self.write_binary(types, filename, ">i4")
+            return
+
         with open(filename, "a") as file:
-            file.write("POINTS {} float\n".format(self.num_points))
+            file.write("POINTS {} {}\n".format(self.num_points, self.vtk_types[dtype]))
             for point in points:
                 file.write(self.np2str(point))
             
@@ -128,6 +151,100 @@ class unstructured_grid(version2):
             for cell in self.cells:
                 file.write("{}\n".format(cell["type"]))
 
+    def write_vtu(self, filename : str)->None:
+        """VTK XML形式(.vtu)で出力
+
+        Args:
+            filename (str): ファイル名
+        Note:
+            * 数値データはリトルエンディアンのbase64エンコード(ヘッダUInt32)で埋め込む。
+            * 浮動小数点型はget_float_dtype、インデックスの整数型はget_connectivityの出力に従う。
+        """
+        with instrument.phase("unstructured_grid.write_vtu") as ph:
+            points = np.concatenate((self.points, np.zeros((self.num_points, 1))), axis = 1) if self.dim == 2 else self.points
+            connectivity, offsets, types = self.get_connectivity()
+            index_type = connectivity.dtype.newbyteorder("<")
+
+            with open(filename, "w") as file:
+                file.write('<?xml version="1.0"?>\n')
+                file.write('<VTKFile type="UnstructuredGrid" version="0.1" byte_order="LittleEndian" header_type="UInt32">\n')
+                file.write("<UnstructuredGrid>\n")
+                file.write('<Piece NumberOfPoints="{}" NumberOfCells="{}">\n'.format(self.num_points, self.num_cells))
+                for tag, data in (("PointData", self.point_data), ("CellData", self.cell_data)):
+                    file.write("<{}>\n".format(tag))
+                    for d in data:
+                        values = d["values"]
+                        if d["type"] == "vector" and values.shape[1] == 2:
+                            values = np.concatenate((values, np.zeros((len(values), 1))), axis = 1)
+                        file.write(self.vtu_array(values, self.get_float_dtype(values).newbyteorder("<"), d["name"]))
+                    file.write("</{}>\n".format(tag))
+                file.write("<Points>\n")
+                file.write(self.vtu_array(points, self.get_float_dtype(self.points).newbyteorder("<")))
+                file.write("</Points>\n")
+                file.write("<Cells>\n")
+                file.write(self.vtu_array(connectivity, index_type, "connectivity"))
+                file.write(self.vtu_array(offsets, index_type, "offsets"))
+                file.write(self.vtu_array(types, np.dtype("u1"), "types"))
+                file.write("</Cells>\n")
+                file.write("</Piece>\n</UnstructuredGrid>\n</VTKFile>\n")
+                ph.add(count = self.num_points + self.num_cells, nbytes = file.tell())
+
+    def vtu_array(self, values : np.ndarray, dtype : np.dtype, name : str = None)->str:
+        """VTU形式のDataArray要素を出力
+        """
+        vtu_types = {"<f4" : "Float32", "<f8" : "Float64", "<i4" : "Int32", "<i8" : "Int64", "|u1" : "UInt8"}
+        dtype = np.dtype(dtype)
+        data = np.ascontiguousarray(values, dtype = dtype).tobytes()
+        encoded = base64.b64encode(np.array([len(data)], dtype = "<u4").tobytes() + data).decode("ascii")
+        components = 1 if values.ndim == 1 else values.shape[1]
+        name = "" if name is None else ' Name="{}"'.format(name)
+        return '<DataArray type="{}"{} NumberOfComponents="{}" format="binary">{}</DataArray>\n'.format(vtu_types[dtype.str], name, components, encoded)
+
+class graph(unstructured_grid):
+    """Object for graph whose cells are line segments (VTK_LINE)
+
+    Args:
+        points (np.ndarray): Coordinates of each points
+        edges (np.ndarray): Edge list in COO format. Its shape is (2, E)
+        float_dtype (type, optional): Floating point type used for writing
+    Attributes:
+        points (np.ndarray): Coordinates of each points
+        edges (np.ndarray): Edge list in COO format
+    Note:
+        * Cells are kept as arrays and are written without creating per-edge objects. ``cells`` builds the dicts only when accessed.
+    """
+    def __init__(self, points : np.ndarray, edges : np.ndarray, point_data:list[dict] = [], cell_data:list[dict] = [], float_dtype:type = None)->None:
+        version2.__init__(self, point_data, cell_data, float_dtype)
+        self.points = points
+        self.edges = np.asarray(edges)
+
+    @property
+    def cells(self) -> tuple: return tuple({"type" : 3, "indice" : e} for e in self.edges.T)
+    @property
+    def num_cells(self) -> int: return self.edges.shape[1]
+
+    def get_connectivity(self)->tuple[np.ndarray]:
+        index_dtype = np.int32 if max(2*self.num_cells, self.num_points) < np.iinfo(np.int32).max else np.int64
+        connectivity = self.edges.T.astype(index_dtype).ravel()
+        offsets = np.arange(2, 2*self.num_cells + 1, 2, dtype = index_dtype)
+        types = np.full(self.num_cells, 3, dtype = np.int64)
+        return connectivity, offsets, types
+
+    def write_dataset(self, filename : str, binary : bool = False)->None:
+        if binary:
+            super().write_dataset(filename, binary)
+            return
+        dtype = self.get_float_dtype(self.points)
+        points = np.concatenate((self.points, np.zeros((self.num_points, 1))), axis = 1) if self.dim == 2 else self.points
+        points = points.astype(dtype, copy = False)
+        with open(filename, "a") as file:
+            file.write("POINTS {} {}\n".format(self.num_points, self.vtk_types[dtype]))
+            np.savetxt(file, points, fmt = "%.9g" if dtype == np.float32 else "%.17g")
+            file.write("CELLS {0} {1}\n".format(self.num_cells, 3*self.num_cells))
+            np.savetxt(file, np.concatenate((np.full((self.num_cells, 1), 2), self.edges.T), axis = 1), fmt = "%d")
+            file.write("CELL_TYPES {}\n".format(self.num_cells))
+            np.savetxt(file, np.full(self.num_cells, 3), fmt = "%d")
+
 class point_cloud(unstructured_grid):
     """Object for point cloud
 
@@ -139,4 +256,4 @@ class point_cloud(unstructured_grid):
         super().__init__(points, cells, point_data, []) #cell_dataは未定義とする
     
     def add_celldata(self, name : str, values : np.ndarray)->None:
-        raise Exception("point cloud can't define cell data")
\ No newline at end of file
+        raise Exception("point cloud can't define cell data")
@@ -0,0 +1,213 @@
+import functools
+import time
+import tracemalloc
+
+#####計測の状態 (enableで変更する)
+_enabled = False
+_memory = False
+_callback = None
+_started_tracing = False
+_records = []
+_stack = []
+
+
+class _Phase:
+    """計測対象の区間を表すコンテキストマネージャ
+
+    Attributes:
+        name (str): 区間名。入れ子の場合は"外側/内側"の形式。
+        count (int): 処理した個数(節点数、要素数など)
+        nbytes (int): 処理したバイト数
+    """
+    __slots__ = ("name", "count", "nbytes", "start", "memory_start", "outer_peak", "inner_peak")
+    def __init__(self, name:str)->None:
+        self.name = "/".join([p.name for p in _stack[-1:]] + [name])
+        self.count = 0
+        self.nbytes = 0
+
+    def add(self, count:int = 0, nbytes:int = 0)->None:
+        """処理した個数とバイト数を加算
+
+        Args:
+            count (int, optional): 個数
+            nbytes (int, optional): バイト数
+        """
+        self.count += count
+        self.nbytes += nbytes
+
+    def __enter__(self)->"_Phase":
+        _stack.append(self)
+        self.inner_peak = 0
+        if _memory:
+            self.memory_start, self.outer_peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args)->bool:
+        elapsed = time.perf_counter() - self.start
+        _stack.pop()
+        peak = None
+        if _memory:
+            peak = max(tracemalloc.get_traced_memory()[1], self.inner_peak)
+            if _stack:
+                _stack[-1].inner_peak = max(_stack[-1].inner_peak, self.outer_peak, peak)
+            peak -= self.memory_start
+
+        record = {"name" : self.name, "time" : elapsed, "count" : self.count, "bytes" : self.nbytes, "peak_memory" : peak}
+        _records.append(record)
+        if _callback is not None:
+            _callback(record)
+        return False
+
+
+class _NullPhase:
+    """計測無効時に返す何もしないコンテキストマネージャ
+    """
+    __slots__ = ()
+    def __bool__(self)->bool:
+        return False
+    def add(self, count:int = 0, nbytes:int = 0)->None:
+        pass
+    def __enter__(self)->"_NullPhase":
+        return self
+    def __exit__(self, *args)->bool:
+        return False
+
+_null_phase = _NullPhase()
+
+
+def enable(memory:bool = False, callback = None)->None:
+    """計測を有効にする
+
+    Args:
+        memory (bool, optional): Trueの場合、tracemallocで各区間のピークメモリを計測する。
+        callback (callable, optional): 区間終了ごとに計測結果(dict)を引数として呼ばれる関数。
+    Note:
+        * memory == Trueの場合、tracemalloc自体のオーバーヘッドにより処理時間は増加する。
+        * memory == Trueの場合、各区間の開始時にtracemalloc.reset_peakを呼ぶため、外部でtracemallocを利用している場合はそのピーク値が失われる。
+        * 計測の状態はプロセス全体で共有される。スレッドからの同時利用は想定しない。
+    """
+    global _enabled, _memory, _callback, _started_tracing
+    _enabled = True
+    _callback = callback
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+
+
+def disable()->None:
+    """計測を無効にする。計測結果は保持される。
+
+    Note:
+        * tracemallocはenableで開始した場合のみ停止する。
+    """
+    global _enabled, _memory, _callback, _started_tracing
+    if _started_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _started_tracing = False
+    _enabled = False
+    _memory = False
+    _callback = None
+
+
+def is_enabled()->bool:
+    """計測が有効か否かを出力
+    """
+    return _enabled
+
+
+def reset()->None:
+    """計測結果を破棄する
+    """
+    _records.clear()
+
+
+def phase(name:str)->_Phase:
+    """名前付き区間を計測するコンテキストマネージャを出力
+
+    Args:
+        name (str): 区間名
+    Returns:
+        _Phase: with文で用いる。計測無効時は何もしないオブジェクト(bool値はFalse)を返す。
+    Note:
+        * 個数やバイト数の計算自体が重い場合は、if ph: ph.add(...) のように計測有効時のみ計算する。
+    """
+    return _Phase(name) if _enabled else _null_phase
+
+
+def _nbytes(value)->int:
+    """配列の合計バイト数を出力
+
+    np.ndarray、scipy.sparseの行列、及びそれらのtuple/dictに対応する。それ以外は0とする。
+    """
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if all(hasattr(value, a) for a in ("data", "indices", "indptr")):
+        return sum(_nbytes(getattr(value, a)) for a in ("data", "indices", "indptr"))
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return 0
+
+
+def timed(func = None, count = None):
+    """関数全体を"モジュール名.関数名"の区間として計測するデコレータ
+
+    Args:
+        count (callable, optional): 関数と同じ引数で呼ばれ、処理した個数を返す関数。Noneの場合は0。
+    Note:
+        * @timed、@timed(count = ...)のいずれの形式でも用いる。
+        * バイト数は戻り値の配列の合計バイト数(_nbytes)とする。
+    """
+    if func is None:
+        return functools.partial(timed, count = count)
+    name = f"{func.__module__}.{func.__qualname__}"
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with _Phase(name) as ph:
+            result = func(*args, **kwargs)
+            ph.add(count = 0 if count is None else count(*args, **kwargs), nbytes = _nbytes(result))
+            return result
+    return wrapper
+
+
+def records()->list[dict]:
+    """区間ごとの計測結果を終了順に出力
+
+    Returns:
+        list[dict]: 計測結果。keyは"name", "time", "count", "bytes", "peak_memory"。
+    """
+    return list(_records)
+
+
+def report()->dict:
+    """区間名ごとに集計した計測結果を出力
+
+    Returns:
+        dict: keyは区間名。valueは"calls", "time", "count", "bytes", "peak_memory"をkeyとする辞書。
+    """
+    summary = {}
+    for record in _records:
+        s = summary.setdefault(record["name"], {"calls" : 0, "time" : 0., "count" : 0, "bytes" : 0, "peak_memory" : None})
+        s["calls"] += 1
+        s["time"] += record["time"]
+        s["count"] += record["count"]
+        s["bytes"] += record["bytes"]
+        if record["peak_memory"] is not None:
+            s["peak_memory"] = max(s["peak_memory"] or 0, record["peak_memory"])
+    return summary
+
+
+def format_report()->str:
+    """reportの結果を表形式の文字列で出力
+    """
+    lines = [f"{'phase':<48}{'calls':>7}{'time [s]':>12}{'count':>12}{'bytes':>14}{'peak [byte]':>14}"]
+    for name, s in report().items():
+        peak = "" if s["peak_memory"] is None else str(s["peak_memory"])
+        lines.append(f"{name:<48}{s['calls']:>7}{s['time']:>12.6f}{s['count']:>12}{s['bytes']:>14}{peak:>14}")
+    return "\n".join(lines)